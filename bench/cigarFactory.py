@@ -0,0 +1,210 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import os
+import sys
+import random
+import timeit
+import optparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from oldCigarFactory import CigarFactory as OldCigarFactory
+from src.interface.Settings import Settings
+from src.variations.factories.CigarFactory import CigarFactory
+
+class SamRead:
+  """
+  SAM read object with fields used by factory
+  """
+
+  def __init__(self, tid, pos, cigar, seq, tags):
+    """
+    Initialize variables
+    """
+    self.tid = tid
+    self.pos = pos
+    self.cigar = cigar
+    self.seq = seq
+    self.tags = tags
+
+  def opt(self, tag):
+    """
+    Return value of tag
+    """
+    for name, value in self.tags:
+      if name == tag:
+        return value
+
+    raise KeyError(tag)
+
+class WrappedRead:
+  """
+  Read object taken by old factory
+  """
+
+  def __init__(self, sam):
+    """
+    Initialize variables
+    """
+    self.sam = sam
+    self.tid = sam.tid
+    self.pos = sam.pos
+
+class Sample:
+  """
+  Sample without region
+  """
+
+  def readOutOfRegion(self, reference, start, end, read):
+    """
+    Test if read is out of region
+    """
+    return False
+
+class Events:
+  """
+  Small variations recorded as list of events
+  """
+
+  def __init__(self):
+    """
+    Initialize variables
+    """
+    self.events = []
+
+  def addSnp(self, *args):
+    """
+    Record SNP
+    """
+    self.events.append(('snp',) + args)
+
+  def addInsertion(self, *args):
+    """
+    Record insertion
+    """
+    self.events.append(('insertion',) + args)
+
+  def addDeletion(self, *args):
+    """
+    Record deletion
+    """
+    self.events.append(('deletion',) + args)
+
+class Discarded:
+  """
+  Small variations which aren't stored
+  """
+
+  def addSnp(self, *args):
+    pass
+
+  def addInsertion(self, *args):
+    pass
+
+  def addDeletion(self, *args):
+    pass
+
+def randomRead(seed):
+  """
+  Return random read with MD tag consistent with CIGAR or random MD tag
+  """
+  random.seed(seed)
+  cigar = [(random.choice((0, 0, 0, 1, 2, 3, 4, 7, 8)), random.randint(1, 12)) for i in xrange(random.randint(1, 6))]
+
+  if random.random() < 0.5: # consistent MD tag
+    mdtag = ""
+    matches = 0
+
+    for operation, length in cigar:
+      if operation in (0, 7, 8):
+        for i in xrange(length):
+          if random.random() < 0.2:
+            mdtag += "%d%s" % (matches, random.choice("ACGTN"))
+            matches = 0
+          else:
+            matches += 1
+      elif operation == 2:
+        mdtag += "%d^%s" % (matches, "".join(random.choice("ACGT") for i in xrange(length)))
+        matches = 0
+
+    mdtag += str(matches)
+  else:
+    mdtag = "".join(random.choice("0123456789ACGT^") for i in xrange(random.randint(0, 25)))
+
+  seq = "".join(random.choice("ACGT") for i in xrange(200))
+  tags = [('NM', 1), ('MD', mdtag)] if random.random() < 0.95 else [('NM', 1)]
+  return SamRead(random.randint(0, 1), random.randint(0, 100), cigar, seq, tags)
+
+def events(factory, read):
+  """
+  Return events of read found by factory, None if factory failed on read
+  """
+  recorded = Events()
+
+  try:
+    factory.snpIndels(read, recorded)
+  except IndexError: # MD tag inconsistent with CIGAR
+    return None
+
+  return recorded.events
+
+def check(old, new, count):
+  """
+  Compare events of old and new factory on random reads, return count of different reads
+  """
+  different = 0
+
+  for seed in xrange(count):
+    read = randomRead(seed)
+
+    if events(old, WrappedRead(read)) != events(new, read):
+      print "different events of read %d: %s %s" % (seed, read.cigar, read.tags)
+      different += 1
+
+  return different
+
+def benchmark(old, new, number, repeat):
+  """
+  Print time of one read of old and new factory for typical reads
+  """
+  seq = "A" * 150
+  tags = lambda mdtag: [('NM', 2), ('MD', mdtag), ('AS', 140), ('XS', 0), ('RG', 'group')]
+  reads = [("150M clean", SamRead(0, 1000, [(0, 150)], seq, tags("150"))),
+           ("150M 2 SNPs", SamRead(0, 1000, [(0, 150)], seq, tags("40A30C78"))),
+           ("5S140M5S 1 SNP", SamRead(0, 1000, [(4, 5), (0, 140), (4, 5)], seq, tags("100T39"))),
+           ("70M2D80M 1 SNP", SamRead(0, 1000, [(0, 70), (2, 2), (0, 80)], seq, tags("35G34^AC80")))]
+  discarded = Discarded()
+
+  for name, read in reads:
+    wrapped = WrappedRead(read)
+    oldTime = min(timeit.repeat(lambda: old.snpIndels(wrapped, discarded), number=number, repeat=repeat)) / number * 1e6
+    newTime = min(timeit.repeat(lambda: new.snpIndels(read, discarded), number=number, repeat=repeat)) / number * 1e6
+    print "%-16s %6.1f us -> %6.1f us" % (name, oldTime, newTime)
+
+def main():
+  """
+  Compare factory of SNPs and indels with its old version
+  """
+  parser = optparse.OptionParser(usage="Usage: %prog [OPTIONS]",
+                                 description="Benchmark and check of events of CigarFactory against its old version.")
+  parser.add_option("-c", "--check",
+                    help="count of random reads compared with old version [%default]",
+                    type="int", metavar="INT", default=200000)
+  parser.add_option("-n", "--number",
+                    help="count of reads in one timing [%default]",
+                    type="int", metavar="INT", default=50000)
+  (options, args) = parser.parse_args()
+  Settings.REFERENCE = None
+  old = OldCigarFactory(Sample())
+  new = CigarFactory(Sample())
+  different = check(old, new, options.check)
+  print "%d of %d random reads have different events" % (different, options.check)
+  benchmark(old, new, options.number, 7)
+  return 1 if different else 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -0,0 +1,234 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import os
+import sys
+import random
+import optparse
+from bx.intervals.intersection import Intersecter, Interval
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from src.variations.Detector import Detector
+from src.variations.Variation import Variation
+from src.variations.clusters.OppositeCluster import OppositeCluster
+
+class Sample:
+  """
+  Sample of one reference with coverage given by positions, enough for joining variations and processing clusters
+  """
+  REFERENCE = "chr1"
+
+  def getReferences(self):
+    """
+    Return names of references
+    """
+    return [Sample.REFERENCE]
+
+  def getRefIndex(self, reference):
+    """
+    Return index of reference
+    """
+    return 0
+
+  def getLengths(self):
+    """
+    Return lengths of references
+    """
+    return [sys.maxint]
+
+  def fetchReference(self, tid, start, end):
+    """
+    Return unknown bases of reference
+    """
+    return "N" * (end - start)
+
+  def getInexactCoverage(self, reference, start, end):
+    """
+    Return coverage counted from positions
+    """
+    return (start * 7 + end) % 30
+
+  def getMinCoverage(self):
+    """
+    Return minimal coverage
+    """
+    return 5
+
+  def getMaxCoverage(self):
+    """
+    Return maximal coverage
+    """
+    return 25
+
+def createVariation(generator, vtype, start):
+  """
+  Create variation with random confidences
+  """
+  info = {'cpos' : -generator.randint(0, 50), 'cend' : generator.randint(0, 50)}
+
+  if vtype == Variation.vtype.INS:
+    info['intervals'] = [[start, start]]
+
+    if generator.random() < 0.3: # inserted sequence without confidences
+      info = {'intervals' : info['intervals']}
+  else:
+    info['end'] = start + generator.randint(1, 300)
+    info['intervals'] = [[start, info['end']]]
+
+  if generator.random() < 0.5:
+    info['cilen'] = [generator.randint(1, 100), generator.randint(100, 400)]
+
+  return Variation(vtype, Sample.REFERENCE, start, None, "N", Variation.mtype.READ_PAIR, info=info)
+
+def createInputs(seed, clusters, variations, length):
+  """
+  Return opposite clusters as tuples of variations and variations sorted by their max starts
+  """
+  generator = random.Random(seed)
+  types = [Variation.vtype.DEL, Variation.vtype.INS, Variation.vtype.INV, Variation.vtype.DUP, Variation.vtype.DUT]
+  opposites = []
+
+  for i in range(clusters):
+    start = generator.randint(100, length)
+    opposites.append(tuple(createVariation(generator, vtype, start + generator.randint(-20, 20))
+                           for vtype in generator.sample(types, generator.randint(2, 3))))
+
+  others = [createVariation(generator, generator.choice(types), generator.randint(100, length)) for i in range(variations)]
+  return opposites, sorted(others, key=lambda v: v.getMaxStart())
+
+def addIntoOpposite(opposites, tree, var, fromCluster):
+  """
+  Add variation into opposite cluster by querying interval tree like the detector before sweeping
+  """
+  added = False
+
+  for interval in tree.find(var.getMaxStart()-1, var.getMaxEnd()+1):
+    items = opposites.get((interval.start, interval.end), [])
+
+    for i in reversed(range(len(items))): # go through all cluster's variations
+      item = items[i]
+      newVariation = item[0].helpDecide(item[1], var, fromCluster)
+
+      if newVariation: # joined
+        added = True
+        (newStart, newEnd) = (newVariation.getMaxStart(), newVariation.getMaxEnd())
+
+        if newStart != interval.start or newEnd != interval.end:
+          opposites[(interval.start, interval.end)].remove(item)
+
+          if not opposites.get((newStart, newEnd), None):
+            opposites[(newStart, newEnd)] = [item]
+            tree.add_interval(Interval(newStart, newEnd))
+          else:
+            opposites[(newStart, newEnd)].append(item)
+
+    if not len(opposites.get((interval.start, interval.end), [None])):
+      del opposites[(interval.start, interval.end)]
+
+  return added
+
+def queried(sample, inputs):
+  """
+  Return variations after opposite clusters are decided by querying interval tree for every variation
+  """
+  (clusters, variations) = inputs
+  opposites = {}
+  tree = Intersecter()
+  finals = []
+  result = []
+
+  for variationsOfCluster in clusters:
+    cluster = OppositeCluster(sample, *variationsOfCluster)
+    append = True
+
+    for var in cluster.getVariations(): # try to add variation into opposite
+      append &= not addIntoOpposite(opposites, tree, var, True)
+
+    if append: # append cluster
+      finals.append(cluster)
+
+      for index, var in enumerate(cluster.getVariations()):
+        interval = (var.getMaxStart(), var.getMaxEnd())
+        opposites[interval] = opposites.get(interval, []) + [(cluster, index)]
+        tree.add_interval(Interval(interval[0], interval[1]))
+
+  for variation in variations:
+    if not addIntoOpposite(opposites, tree, variation, False):
+      result.append(variation)
+
+  unused = set()
+  helpers = set()
+
+  while len(finals):
+    cluster = finals.pop()
+    cluster.process()
+    winner = cluster.getWinner()
+
+    if winner: # append winner
+      result.append(winner)
+      helpers |= cluster.getHelpers()
+
+    unused |= cluster.getUnused()
+
+  return result + list(unused.difference(helpers))
+
+def swept(sample, inputs):
+  """
+  Return variations after opposite clusters are decided by detector
+  """
+  (clusters, variations) = inputs
+  detector = Detector(sample, None, None)
+  detector._Detector__clearVariables()
+
+  for variationsOfCluster in clusters:
+    detector._Detector__addOppositeCluster(OppositeCluster(sample, *variationsOfCluster))
+
+  detector._Detector__variations[Sample.REFERENCE].extend(variations)
+  detector._Detector__processOppositeClusters()
+  return detector._Detector__settled[Sample.REFERENCE]
+
+def describe(variations):
+  """
+  Return sorted descriptions of variations
+  """
+  return sorted((v.getType(), v.getStart(), v.getMaxStart(), v.getMaxEnd(), v.getInfo('depth'),
+                 v.getInfo('cilen'), v.getInfo('svlen'), v.getEnd()) for v in variations)
+
+def main():
+  """
+  Compare variations decided by opposite clusters in detector with querying interval tree for every variation
+  """
+  parser = optparse.OptionParser(usage="Usage: %prog [OPTIONS]",
+                                 description="Check that sweep of opposite clusters gives the same winners, helpers and unused variations as querying interval tree.")
+  parser.add_option("-s", "--seeds",
+                    help="number of random inputs [%default]",
+                    type="int", metavar="INT", default=200)
+  parser.add_option("-c", "--clusters",
+                    help="number of opposite clusters of input [%default]",
+                    type="int", metavar="INT", default=300)
+  parser.add_option("-v", "--variations",
+                    help="number of other variations of input [%default]",
+                    type="int", metavar="INT", default=600)
+  parser.add_option("-l", "--length",
+                    help="length of region with variations, short region has more overlaps [%default]",
+                    type="int", metavar="INT", default=20000)
+  (options, args) = parser.parse_args()
+  sample = Sample()
+  differ = 0
+
+  for seed in range(options.seeds):
+    expected = describe(queried(sample, createInputs(seed, options.clusters, options.variations, options.length)))
+    result = describe(swept(sample, createInputs(seed, options.clusters, options.variations, options.length)))
+
+    if expected != result:
+      differ += 1
+      print "seed %d: %d variations by querying tree, %d variations by sweeping" % (seed, len(expected), len(result))
+
+  print "%d of %d inputs differ" % (differ, options.seeds)
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,133 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import os
+import sys
+import time
+import pysam
+import optparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+from src.resources.Sample import Sample
+from src.resources.reads.PairBatch import PairBatch
+from src.resources.reads.Paired import Paired
+
+def fetchPairs(filename, region, count):
+  """
+  Return pairs (read, mate) of reads in region in order of first reads, mate of pair out of region is None
+  """
+  samfile = pysam.Samfile(filename)
+  waiting = {}
+  pairs = []
+
+  for read in samfile.fetch(region=region):
+    if read.is_unmapped or read.is_secondary:
+      continue
+    elif read.qname in waiting:
+      pairs[waiting.pop(read.qname)][1] = read
+    elif len(pairs) < count:
+      waiting[read.qname] = len(pairs)
+      pairs.append([read, None])
+    elif not waiting:
+      break
+
+  return [tuple(pair) for pair in pairs], samfile.lengths, samfile.references
+
+def classifyPaired(pairs, lengths, references):
+  """
+  Classify every pair by Paired and return paired reads
+  """
+  result = []
+
+  for read, mate in pairs:
+    paired = Paired(read, mate, lengths, references, [])
+    paired.actualSize()
+    result.append(paired)
+
+  return result
+
+def classifyBatches(pairs, lengths, references):
+  """
+  Classify pairs in batches, pairs which aren't plain by Paired, and return plain or paired reads
+  """
+  result = []
+
+  for first in range(0, len(pairs), Sample.BATCH_PAIRS):
+    for read, mate, plain in PairBatch(pairs[first:first + Sample.BATCH_PAIRS]):
+      if plain:
+        plain.actualSize()
+        result.append(plain)
+      else:
+        paired = Paired(read, mate, lengths, references, [])
+        paired.actualSize()
+        result.append(paired)
+
+  return result
+
+def columns(pairs):
+  """
+  Only extract columns of reads like batches do
+  """
+  for read, mate in pairs:
+    PairBatch._PairBatch__columns(read)
+
+    if mate:
+      PairBatch._PairBatch__columns(mate)
+
+def measure(function, repeat, *args):
+  """
+  Return the best time of function in seconds and its result
+  """
+  best = None
+
+  for i in range(repeat):
+    start = time.time()
+    result = function(*args)
+    elapsed = time.time() - start
+    best = elapsed if best is None else min(best, elapsed)
+
+  return best, result
+
+def main():
+  """
+  Compare classifying pairs of reads in batches with classifying every pair by Paired
+  """
+  parser = optparse.OptionParser(usage="Usage: %prog [OPTIONS] <sample.bam>",
+                                 description="Measure classification of pairs of reads in batches and by Paired and check that plain pairs are normal pairs with the same insert size.")
+  parser.add_option("-r", "--region",
+                    help="region (chr:from-to) of reads, default: whole file",
+                    metavar="STR")
+  parser.add_option("-n", "--pairs",
+                    help="maximal count of pairs [%default]",
+                    type="int", metavar="INT", default=200000)
+  parser.add_option("-t", "--repeat",
+                    help="count of measurements, the best one is printed [%default]",
+                    type="int", metavar="INT", default=3)
+  (options, args) = parser.parse_args()
+
+  if len(args) != 1:
+    parser.error("Please specify file with sample")
+
+  (pairs, lengths, references) = fetchPairs(args[0], options.region, options.pairs)
+  (pairedTime, classified) = measure(classifyPaired, options.repeat, pairs, lengths, references)
+  (batchTime, batched) = measure(classifyBatches, options.repeat, pairs, lengths, references)
+  (columnsTime, nothing) = measure(columns, options.repeat, pairs)
+  plain = 0
+  differ = 0
+
+  for paired, result in zip(classified, batched):
+    if result.isPlain():
+      plain += 1
+      differ += not paired.isNormal() or paired.size() != result.size() or paired.actualSize() != result.actualSize()
+
+  perPair = lambda seconds: seconds / max(1, len(pairs)) * 1000000
+  print "%d pairs, %d plain in batches (%.1f %%), %d plain pairs differ from Paired" % (len(pairs), plain, 100.0 * plain / max(1, len(pairs)), differ)
+  print "Paired:  %.2f s, %.2f us per pair" % (pairedTime, perPair(pairedTime))
+  print "batches: %.2f s, %.2f us per pair, columns of reads %.2f us per pair" % (batchTime, perPair(batchTime), perPair(columnsTime))
+
+if __name__ == '__main__':
+  main()
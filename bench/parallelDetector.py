@@ -0,0 +1,64 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import os
+import sys
+import difflib
+import optparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import gataca
+from src.variations.ParallelDetector import ParallelDetector
+
+def detect(sample, reference, jobs, region):
+  """
+  Run detection in jobs processes without saved statistics and return lines of VCF output
+  """
+  (descriptor, output) = tempfile.mkstemp(suffix=".vcf")
+  os.close(descriptor)
+
+  try:
+    gataca.main([gataca.__file__, "-k", "-j", str(jobs), "-o", output] + (["-r", region] if region else []) + [sample, reference])
+
+    with open(output) as vcf:
+      return vcf.readlines()
+  finally:
+    os.remove(output)
+
+def main():
+  """
+  Compare variations found in chunks by more processes with variations found in one pass
+  """
+  parser = optparse.OptionParser(usage="Usage: %prog [OPTIONS] <sample.bam> <reference.fasta>",
+                                 description="Check that parallel detection writes the same VCF as detection in one process.")
+  parser.add_option("-j", "--jobs",
+                    help="number of processes of parallel detection [%default]",
+                    type="int", metavar="INT", default=4)
+  parser.add_option("-c", "--chunk_size",
+                    help="length of chunk, small chunks have more boundaries [%default]",
+                    type="int", metavar="INT", default=1000000)
+  parser.add_option("-r", "--region",
+                    help="region (chr:from-to) of detection, default: whole genome",
+                    metavar="STR")
+  (options, args) = parser.parse_args()
+
+  if len(args) != 2:
+    parser.error("Please specify file with sample and file with reference genome")
+
+  serial = detect(args[0], args[1], 1, options.region)
+  ParallelDetector.CHUNK_SIZE = options.chunk_size
+  parallel = detect(args[0], args[1], options.jobs, options.region)
+  difference = list(difflib.unified_diff(serial, parallel, "-j 1", "-j %d" % options.jobs))
+  sys.stdout.writelines(difference)
+  print "%d records in one process, %d records in %d processes, outputs %s" % (len([line for line in serial if not line.startswith('#')]),
+                                                                               len([line for line in parallel if not line.startswith('#')]),
+                                                                               options.jobs, "differ" if difference else "are equal")
+  return 1 if difference else 0
+
+if __name__ == "__main__":
+  sys.exit(main())
@@ -16,12 +16,13 @@ from src.interface.Settings import Settings
 from src.resources.Sample import Sample
 from src.resources.reads.Read import Read
 from src.variations.Detector import Detector
+from src.variations.ParallelDetector import ParallelDetector
 
 def getParameters(argv):
   """
   Return parsed cmd parameters
   """
-  parser = optparse.OptionParser(usage="Usage: %prog [OPTIONS] <sample.bam> <reference.fasta>",
+  parser = optparse.OptionParser(usage="Usage: %prog [OPTIONS] <sample.bam> [<sample.bam> ...] <reference.fasta>",
                                  description="Detection of genome variations in mapped reads on reference genome.")
 
   inout = optparse.OptionGroup(parser, "Input/output")
@@ -31,6 +32,24 @@ def getParameters(argv):
   inout.add_option("-o", "--output",
                    help="name of output VCF file, default: standard output",
                    metavar="STR")
+  inout.add_option("-j", "--jobs",
+                   help="number of processes which find variations in chunks of genome [%default]",
+                   type="int", metavar="INT", default=Settings.JOBS)
+  inout.add_option("-s", "--statistics",
+                   help="print statistics for tuning of settings to standard error",
+                   action="store_true", default=Settings.STATISTICS)
+  inout.add_option("-k", "--no_profile",
+                   help="don't save statistics and evidence-bearing reads of sample next to it and don't load them in next runs",
+                   action="store_false", dest="profile", default=Settings.PROFILE)
+  inout.add_option("-f", "--streaming",
+                   help="write variations while reads are read, only variations near them are held in memory",
+                   action="store_true", default=Settings.STREAMING)
+  inout.add_option("-x", "--collated",
+                   help="reads of sample are name-sorted or collated, sample - is BAM read from standard input",
+                   action="store_true", default=Settings.COLLATED)
+  inout.add_option("-b", "--no_batch",
+                   help="don't classify pairs of reads in batches, build every pair of reads alone",
+                   action="store_false", dest="batch", default=Settings.BATCH)
   parser.add_option_group(inout)
 
   read = optparse.OptionGroup(parser, "Reads")
@@ -43,6 +62,15 @@ def getParameters(argv):
   read.add_option("-l", "--min_length",
                   help="minimal length of split part [%default]",
                   type="int", metavar="INT", default=Settings.MIN_PART_LENGTH)
+  read.add_option("-t", "--threads",
+                  help="number of threads used by bwa for remapping of split parts [%default]",
+                  type="int", metavar="INT", default=Settings.THREADS)
+  read.add_option("-d", "--mate_distance",
+                  help="maximal distance of mates collated without seeking in file [%default]",
+                  type="int", metavar="INT", default=Settings.MATE_DISTANCE)
+  read.add_option("-g", "--cache",
+                  help="directory with cached bwa indexes of contigs used for remapping, default: next to reference genome",
+                  metavar="STR", default=Settings.CACHE_PATH)
   parser.add_option_group(read)
 
   coverage = optparse.OptionGroup(parser, "Depth of coverage")
@@ -125,9 +153,6 @@ def main(argv):
   """
   Main function
   """
-  if not os.path.exists(Sample.TMP_PATH): # create tmp dir
-    os.makedirs(Sample.TMP_PATH)
-
   if not os.path.exists(Logger.LOG_PATH): # create log dir
     os.makedirs(Logger.LOG_PATH)
 
@@ -137,6 +162,8 @@ def main(argv):
   if len(args) < 2: # check required input files
     sys.exit("Please specify file with sample and file with reference genome")
 
+  samples = args[:-1] # sample can be split into more files
+
   if not params['output']: # set output
     params['output'] = sys.stdout
 
@@ -145,6 +172,9 @@ def main(argv):
   Settings.POLICY = Read.ptype.FR if params['policy'] == "fr" else Read.ptype.RF
   Settings.MIN_QUALITY = params['min_quality']
   Settings.MIN_PART_LENGTH = checkPositive("Minimal length", params['min_length'])
+  Settings.THREADS = checkPositive("Threads", params['threads'])
+  Settings.MATE_DISTANCE = checkPositive("Mate distance", params['mate_distance'])
+  Settings.CACHE_PATH = params['cache']
   Settings.WINDOW_SIZE = checkPositive("Window size", params['window_size'])
   (Settings.MIN_COVERAGE, Settings.MAX_COVERAGE) = parseInterval("Coverage", params['coverage'])
   Settings.COVERAGE_CORE = checkInterval("Coverage core", params['coverage_core'], 0, False, 1, True)
@@ -154,16 +184,40 @@ def main(argv):
   Settings.INSERT_CORE = checkInterval("Insert core", params['insert_core'], 0, False, 1, True)
   Settings.MIN_INSERT_COUNT = checkPositive("Minimal insert count", params['min_insert_count'])
   Settings.MIN_CONFIDENCE = checkInterval("Minimal confidence", params['min_confidence'], 0, True, 1, True)
+  Settings.STATISTICS = params['statistics']
+  Settings.JOBS = checkPositive("Jobs", params['jobs'])
+  Settings.PROFILE = params['profile']
+  Settings.STREAMING = params['streaming']
+  Settings.BATCH = params['batch']
+  Settings.COLLATED = params['collated']
+
+  if "-" in samples and (len(samples) > 1 or not Settings.COLLATED): # only collated reads can be read from stream
+    sys.exit("Standard input can be read only alone with collated reads")
+
+  if Settings.COLLATED and (Settings.JOBS > 1 or Settings.STREAMING): # collated reads are read in one pass
+    sys.exit("Collated reads can't be read in more jobs or in streaming mode")
+
+  if samples[0] == "-": # statistics can't be saved next to stream
+    Settings.PROFILE = False
 
   # create objects and start
-  refgenome = pysam.Fastafile(args[1])
-  sample = Sample(args[0], refgenome)
+  refgenome = pysam.Fastafile(args[-1])
+  sample = Sample(samples, refgenome)
 
   if Settings.REFERENCE and Settings.REFERENCE not in sample.getReferences(): # check reference name
     sys.exit("Unknown chromosome")
 
-  detector = Detector(sample, refgenome, params['output'])
+  if Settings.JOBS > 1: # parallel detection
+    detector = ParallelDetector(samples, sample, refgenome, params['output'], Settings.JOBS)
+  else:
+    detector = Detector(sample, refgenome, params['output'])
+
   detector.start()
+
+  if Settings.STATISTICS: # print statistics for tuning
+    for name, value in sample.getStatistics() + detector.getStatistics():
+      sys.stderr.write("%s: %s\n" % (name, value))
+
   sample.close()
 
 if __name__ == "__main__":
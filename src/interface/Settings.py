@@ -17,6 +17,10 @@ class Settings:
   POLICY = "fr" # how reads where sequenced
   MIN_QUALITY = 30 # minimal quality to not be filtered out
   MIN_PART_LENGTH = 10 # minimal length of split parts
+  MATE_DISTANCE = 100000 # maximal distance of mates collated without seeking in file
+  THREADS = 1 # number of threads used by bwa
+  COLLATED = False # reads of sample are name-sorted or collated
+  CACHE_PATH = None # directory with cached bwa indexes of contigs, next to reference genome if it's None
 
   # coverage
   WINDOW_SIZE = 100 # length of window for getting coverage
@@ -34,3 +38,10 @@ class Settings:
 
   # variations
   MIN_CONFIDENCE = 0.3 # minimal confidence about variation
+
+  # tuning
+  STATISTICS = False # print statistics for tuning
+  JOBS = 1 # number of processes finding variations
+  PROFILE = True # save statistics of sample and load them in next runs
+  STREAMING = False # write clusters while reads are read
+  BATCH = True # classify pairs of reads in batches
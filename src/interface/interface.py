@@ -5,8 +5,10 @@ __author__ = "Tomáš Beluský"
 __date__ = "05.03. 2013"
 
 import re
+import os
 import sys
 import math
+import hashlib
 
 def enum(**enums):
   """
@@ -44,3 +46,29 @@ def parseRegion(string):
       region[i] = int(region[i]) if region[i] else None
 
   return region
+
+def readFastaIndex(filename):
+  """
+  Return names and lengths of contigs from index of FASTA file
+  """
+  contigs = []
+
+  with open("%s.fai" % filename) as indexFile:
+    for line in indexFile:
+      columns = line.split('\t')
+      contigs.append((columns[0], int(columns[1])))
+
+  return contigs
+
+def referenceChecksum(filename):
+  """
+  Return checksum of FASTA file from its index, size and time of modification
+  """
+  checksum = hashlib.md5()
+  stat = os.stat(filename)
+
+  with open("%s.fai" % filename) as indexFile:
+    checksum.update(indexFile.read())
+
+  checksum.update("%d:%d" % (stat.st_size, int(stat.st_mtime)))
+  return checksum.hexdigest()
@@ -0,0 +1,98 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import os
+import tempfile
+import numpy
+
+from src.interface.interface import *
+
+class GcTrack:
+  """
+  GC content of all windows of reference genome in percents
+    Track is computed in blocks and cached in file next to reference genome
+  """
+  BLOCK_WINDOWS = 10000 # count of windows computed at once
+  GC_BASES = numpy.array([ord(x) for x in "GCgc"], numpy.uint8)
+
+  def __init__(self, refgenome, windowSize):
+    """
+    Initialize variables and load or build track
+    """
+    self.__refgenome = refgenome
+    self.__windowSize = windowSize
+    self.__offsets = {}
+    count = 0
+
+    for name, length in readFastaIndex(refgenome.filename): # windows of all contigs in one array
+      windows = length // windowSize + 1
+      self.__offsets[name] = (count, count + windows)
+      count += windows
+
+    checksum = referenceChecksum(refgenome.filename)
+    self.__filename = "%s.gc%d_%s.npy" % (refgenome.filename, windowSize, checksum)
+
+    if os.path.exists(self.__filename): # load cached track
+      self.__track = numpy.load(self.__filename, mmap_mode='r')
+
+      if len(self.__track) == count:
+        return
+
+    self.__track = self.__build(count)
+    self.__save()
+
+  def __build(self, count):
+    """
+    Count GC content of all windows
+    """
+    track = numpy.zeros(count, numpy.int8)
+    blockSize = GcTrack.BLOCK_WINDOWS * self.__windowSize
+
+    for name, (first, last) in self.__offsets.items():
+      for start in xrange(0, (last - first) * self.__windowSize, blockSize): # go through contig in blocks
+        sequence = self.__refgenome.fetch(reference=name, start=start, end=start + blockSize)
+
+        if not sequence:
+          break
+
+        bases = numpy.frombuffer(sequence, numpy.uint8)
+        windows = (len(bases) + self.__windowSize - 1) // self.__windowSize
+        gcBases = numpy.zeros(windows * self.__windowSize, numpy.int32)
+        gcBases[:len(bases)] = numpy.in1d(bases, GcTrack.GC_BASES)
+        gcCount = gcBases.reshape(windows, self.__windowSize).sum(axis=1)
+        index = first + start // self.__windowSize
+        track[index:index+windows] = (gcCount * 200 + self.__windowSize) // (2 * self.__windowSize) # rounded percents
+
+    return track
+
+  def __save(self):
+    """
+    Save track into cache file, track stays only in memory if it can't be written
+    """
+    try:
+      (descriptor, tmpname) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.__filename)))
+    except (IOError, OSError):
+      return
+
+    try:
+      with os.fdopen(descriptor, 'wb') as cacheFile:
+        numpy.save(cacheFile, self.__track)
+
+      os.chmod(tmpname, 0644)
+      os.rename(tmpname, self.__filename) # atomic replace
+    except (IOError, OSError):
+      if os.path.exists(tmpname):
+        os.remove(tmpname)
+
+  def getContig(self, name):
+    """
+    Return GC contents of windows of contig
+    """
+    if name not in self.__offsets:
+      raise Exception("Chromosome '%s' is missing in reference genome" % name)
+
+    (first, last) = self.__offsets[name]
+    return self.__track[first:last]
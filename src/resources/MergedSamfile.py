@@ -0,0 +1,151 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import heapq
+import itertools
+import pysam
+
+class MergedSamfile:
+  """
+  Files of one sample read like one file, reads of files are merged by their positions
+    Files must have the same references, mates are looked up in all files
+  """
+
+  def __init__(self, filenames):
+    """
+    Initialize variables and check references of files
+    """
+    self.__files = [pysam.Samfile(filename) for filename in filenames]
+    first = self.__files[0]
+
+    for other in self.__files[1:]:
+      if other.references != first.references or other.lengths != first.lengths:
+        self.close()
+        raise Exception("Files of sample have different references")
+
+    self.__header = self.__mergeHeaders()
+
+  @property
+  def references(self):
+    """
+    Return list of reference names
+    """
+    return self.__files[0].references
+
+  @property
+  def lengths(self):
+    """
+    Return list of reference lengths
+    """
+    return self.__files[0].lengths
+
+  @property
+  def nreferences(self):
+    """
+    Return count of references
+    """
+    return self.__files[0].nreferences
+
+  @staticmethod
+  def __renamed(program, renamed):
+    """
+    Return copy of program line with renamed id and previous program
+    """
+    program = dict(program)
+
+    for tag in ('ID', 'PP'):
+      if program.get(tag) in renamed:
+        program[tag] = renamed[program[tag]]
+
+    return program
+
+  def __mergeHeaders(self):
+    """
+    Return header of first file with read groups and programs of all files
+    """
+    header = dict(self.__files[0].header)
+    groups = []
+    programs = []
+
+    for index, reads in enumerate(self.__files):
+      renamed = {} # original id: unique id of program in file
+
+      for line in reads.header.get('RG', ()):
+        if line.get('ID') not in [group.get('ID') for group in groups]: # the same group can be in more files
+          groups.append(line)
+
+      renaming = True
+
+      while renaming: # programs with renamed previous programs can differ too
+        renaming = False
+
+        for line in reads.header.get('PG', ()):
+          if line.get('ID') not in renamed and MergedSamfile.__renamed(line, renamed) not in programs and \
+             line.get('ID') in [program.get('ID') for program in programs]: # different program with the same id
+            renamed[line['ID']] = "%s.%d" % (line['ID'], index)
+            renaming = True
+
+      for line in reads.header.get('PG', ()):
+        line = MergedSamfile.__renamed(line, renamed)
+
+        if line not in programs: # the same program can be in more files
+          programs.append(line)
+
+    if groups:
+      header['RG'] = groups
+
+    if programs:
+      header['PG'] = programs
+
+    return header
+
+  @property
+  def header(self):
+    """
+    Return header merged when files were opened
+    """
+    return self.__header
+
+  def __keyed(self, reads, index):
+    """
+    Return reads with key of their position, unplaced reads are after placed ones and reads with the same key stay in order of files
+    """
+    for order, read in enumerate(reads):
+      yield read.tid if read.tid >= 0 else self.nreferences, read.pos, index, order, read
+
+  def fetch(self, reference=None, start=None, end=None):
+    """
+    Fetch reads of region from all files in order of their positions
+    """
+    reads = [self.__keyed(reads.fetch(reference=reference, start=start, end=end), index) for index, reads in enumerate(self.__files)]
+
+    for item in heapq.merge(*reads):
+      yield item[-1]
+
+  def __iter__(self):
+    """
+    Return all reads of files one file after another
+    """
+    return itertools.chain(*self.__files)
+
+  def mate(self, read):
+    """
+    Return mate of read from any file
+    """
+    for reads in self.__files:
+      try:
+        return reads.mate(read)
+      except ValueError: # mate isn't in file
+        pass
+
+    raise ValueError("mate not found")
+
+  def close(self):
+    """
+    Close all files
+    """
+    for reads in self.__files:
+      reads.close()
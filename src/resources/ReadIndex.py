@@ -0,0 +1,181 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import array
+import numpy
+import tempfile
+
+from src.interface.Settings import Settings
+
+class ReadIndex:
+  """
+  Exact counts of usable reads in interval counted from starts and ends of reads
+    Positions are spilled into temporary file while reads are read, so reads don't have to be sorted
+    Counts of one reference are built when it is counted first and released when another reference is counted
+  """
+  BIN_SIZE = 256 # length of bin of counted positions, offsets of positions in bin fit into byte
+  BUFFER_SIZE = 100000 # count of positions of reference spilled into file at once
+
+  def __init__(self, lengths):
+    """
+    Initialize variables
+    """
+    self.__lengths = lengths
+    self.__file = None # spilled blocks of starts and ends
+    self.__blocks = [[] for length in lengths] # (offset, count) of spilled blocks of reference
+    self.__starts = [array.array('i') for length in lengths] # buffered positions
+    self.__ends = [array.array('i') for length in lengths]
+    self.__indexed = {} # tid: (start, end) of read interval
+    self.__built = None # (tid, start counts, start offsets, end counts, end offsets) of counted reference
+
+  @staticmethod
+  def isUsable(read):
+    """
+    Test if read is counted into coverage
+    """
+    return read.tid >= 0 and not read.is_duplicate and (read.mapq == 0 or Settings.MIN_QUALITY <= read.mapq)
+
+  @staticmethod
+  def readEnd(read):
+    """
+    Return end of read which is indexed
+    """
+    return read.aend if read.aend else read.pos + 1
+
+  def __spill(self, tid, starts, ends):
+    """
+    Append block of starts and ends of reference into file
+    """
+    if self.__file is None:
+      self.__file = tempfile.TemporaryFile(suffix=".idx")
+
+    self.__file.seek(0, 2)
+    self.__blocks[tid].append((self.__file.tell(), len(starts)))
+    starts.tofile(self.__file)
+    ends.tofile(self.__file)
+
+  def __flush(self, tid):
+    """
+    Spill buffered positions of reference
+    """
+    if self.__starts[tid]:
+      self.__spill(tid, self.__starts[tid], self.__ends[tid])
+      self.__starts[tid] = array.array('i')
+      self.__ends[tid] = array.array('i')
+
+  def __load(self, tid):
+    """
+    Return starts and ends of reference spilled into file
+    """
+    starts = [numpy.zeros(0, numpy.int32)]
+    ends = [numpy.zeros(0, numpy.int32)]
+
+    if self.__blocks[tid]:
+      self.__file.flush()
+
+    for offset, count in self.__blocks[tid]:
+      self.__file.seek(offset)
+      positions = numpy.fromfile(self.__file, numpy.int32, 2 * count)
+      starts.append(positions[:count])
+      ends.append(positions[count:])
+
+    return numpy.concatenate(starts), numpy.concatenate(ends)
+
+  def __counts(self, tid, positions):
+    """
+    Return counts of positions before bins and sorted offsets of positions in bins
+    """
+    positions.sort()
+    bounds = numpy.arange(self.__lengths[tid] // ReadIndex.BIN_SIZE + 2, dtype=numpy.int64) * ReadIndex.BIN_SIZE
+    return numpy.searchsorted(positions, bounds).astype(numpy.int64), (positions % ReadIndex.BIN_SIZE).astype(numpy.uint8)
+
+  def __build(self, tid):
+    """
+    Build counts of reference and release counts of previous one
+    """
+    self.__built = None
+    (starts, ends) = self.__load(tid)
+    self.__built = (tid,) + self.__counts(tid, starts) + self.__counts(tid, ends)
+
+  @staticmethod
+  def __prefix(counts, offsets, position):
+    """
+    Return count of positions which aren't greater than position
+    """
+    if position < 0:
+      return 0
+
+    index = position // ReadIndex.BIN_SIZE
+
+    if len(counts) - 1 <= index: # after last bin
+      return int(counts[-1])
+
+    (first, last) = (counts[index], counts[index + 1])
+    return int(first + numpy.searchsorted(offsets[first:last], position % ReadIndex.BIN_SIZE, 'right'))
+
+  def add(self, read):
+    """
+    Add read if it is counted into coverage
+    """
+    if not ReadIndex.isUsable(read):
+      return
+
+    self.__starts[read.tid].append(read.pos)
+    self.__ends[read.tid].append(ReadIndex.readEnd(read))
+
+    if len(self.__starts[read.tid]) == ReadIndex.BUFFER_SIZE: # spill whole buffer at once
+      self.__flush(read.tid)
+
+  def export(self):
+    """
+    Return positions of added reads as (reference, starts, ends)
+    """
+    exported = []
+
+    for tid in xrange(len(self.__lengths)):
+      self.__flush(tid)
+
+      if self.__blocks[tid]:
+        exported.append((tid,) + self.__load(tid))
+
+    return exported
+
+  def merge(self, exported):
+    """
+    Add positions exported from other index
+    """
+    for tid, starts, ends in exported:
+      self.__spill(tid, starts, ends)
+
+  def finish(self, references, start=None, end=None):
+    """
+    Finish adding of reads of references which were read in interval [start, end), whole references by default
+    """
+    for tid in references:
+      self.__flush(tid)
+      self.__starts[tid] = None # reads aren't added anymore
+      self.__ends[tid] = None
+      self.__indexed[tid] = (start, end)
+
+  def count(self, reference, start, end):
+    """
+    Return count of reads overlapping interval [start, end] or None if interval isn't indexed
+    """
+    if reference not in self.__indexed:
+      return None
+
+    (indexStart, indexEnd) = self.__indexed[reference]
+
+    if (indexStart is not None and start < indexStart) or (indexEnd is not None and indexEnd <= end):
+      return None
+
+    if self.__built is None or self.__built[0] != reference:
+      self.__build(reference)
+
+    (tid, startCounts, startOffsets, endCounts, endOffsets) = self.__built
+    started = ReadIndex.__prefix(startCounts, startOffsets, end) # reads with start <= end
+    ended = ReadIndex.__prefix(endCounts, endOffsets, start) # reads with end <= start
+    return started - ended
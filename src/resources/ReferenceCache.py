@@ -0,0 +1,73 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import collections
+
+class ReferenceCache:
+  """
+  Blocks of reference genome held in memory, short sequences are sliced from them
+    The least recently used block is dropped when cache is full
+  """
+  BLOCK_SIZE = 1048576 # length of cached block
+  CACHE_BLOCKS = 8 # count of blocks held in memory
+
+  def __init__(self, refgenome):
+    """
+    Initialize variables
+    """
+    self.__refgenome = refgenome
+    self.__blocks = collections.OrderedDict()
+    self.__hits = 0
+    self.__misses = 0
+
+  def __block(self, reference, number):
+    """
+    Return sequence of reference block
+    """
+    key = (reference, number)
+
+    if key in self.__blocks: # move block to the end
+      block = self.__blocks.pop(key)
+      self.__hits += 1
+    else:
+      start = number * ReferenceCache.BLOCK_SIZE
+      block = self.__refgenome.fetch(reference=reference, start=start, end=start + ReferenceCache.BLOCK_SIZE)
+      self.__misses += 1
+
+      if len(self.__blocks) == ReferenceCache.CACHE_BLOCKS:
+        self.__blocks.popitem(last=False)
+
+    self.__blocks[key] = block
+    return block
+
+  def fetch(self, reference, start, end):
+    """
+    Return sequence of reference in interval [start, end), longer sequences are fetched from reference genome
+    """
+    if start < 0 or end <= start or ReferenceCache.BLOCK_SIZE < end - start:
+      return self.__refgenome.fetch(reference=reference, start=start, end=end)
+
+    first = start // ReferenceCache.BLOCK_SIZE
+    last = (end - 1) // ReferenceCache.BLOCK_SIZE
+    offset = start - first * ReferenceCache.BLOCK_SIZE
+    sequence = self.__block(reference, first)[offset:offset + end - start]
+
+    if first != last: # sequence continues in next block
+      sequence += self.__block(reference, last)[:end - last * ReferenceCache.BLOCK_SIZE]
+
+    return sequence
+
+  def getHits(self):
+    """
+    Return count of blocks found in cache
+    """
+    return self.__hits
+
+  def getMisses(self):
+    """
+    Return count of blocks fetched from reference genome
+    """
+    return self.__misses
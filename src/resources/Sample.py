@@ -4,46 +4,125 @@
 __author__ = "Tomáš Beluský"
 __date__ = "05.03. 2013"
 
+import os
 import sys
 import math
+import shutil
+import cPickle
+import tempfile
 import pysam
-import re
-import os
-import glob
+import numpy
 
 from src.interface.Settings import Settings
+from reads.CollatedPairs import CollatedPairs
+from reads.MateBuffer import MateBuffer
+from reads.PairBatch import PairBatch
 from reads.Paired import Paired
 from reads.Read import Read
-from reads.SplitPart import SplitPart
+from reads.SplitGroups import SplitGroups
+from GcTrack import GcTrack
+from MergedSamfile import MergedSamfile
+from ReadIndex import ReadIndex
+from ReferenceCache import ReferenceCache
 from src.tools.Bwa import Bwa
+from src.tools.BwaStream import BwaStream
+from src.tools.LocalAligner import LocalAligner
 from src.interface.interface import *
 
 class Sample:
   """
   Represents sample and also hold file with reference genome
   """
-  TMP_PATH = "tmp"
-  FILENAME_TEMPLATE = "%s/%d_" % (TMP_PATH, os.getpid())
-  reGCcontent = re.compile('[G|C]', re.I) # re for getting length of GC content
-
-  def __init__(self, filename, refgenome):
+  WINDOW_BUFFER = 100000 # count of windows added into coverage at once
+  CONSENSUS_NAME = "gataca-consensus-" # name of remapped consensus of soft-clipped sequences
+  PROFILE_SUFFIX = ".gataca" # suffix of file with saved statistics of sample
+  PROFILE_VERSION = 2 # version of format of saved statistics
+  EVIDENCE_SUFFIX = ".gataca.bam" # suffix of side file with evidence-bearing reads
+  STREAMING_STEP = 1000000 # distance of cursor between remappings of held split reads in streaming mode
+  COVERAGE_WINDOWS = 100000 # count of windows passed by cursor which estimate coverage in streaming mode
+  REMAP_STEP = 100000 # distance of cursor between remappings of passed groups of soft-clipped sequences
+  BATCH_PAIRS = 10000 # count of pairs classified at once in batch mode
+
+  def __init__(self, filename, refgenome, statistics=None):
     """
-    Initialize variables
+    Initialize variables, statistics exported from other sample of the same file can be used
+      Otherwise statistics saved by previous run over the same file and settings are loaded
+      Sample split into more files is given by list of filenames, its statistics are saved next to first file
     """
-    self.__reads = pysam.Samfile(filename)
+    self.__filenames = [filename] if isinstance(filename, basestring) else list(filename)
+    self.__filename = self.__filenames[0]
+
+    if len(self.__filenames) > 1: # reads of files are merged
+      self.__reads = MergedSamfile(self.__filenames)
+    elif self.__filename == "-": # BAM from standard input
+      self.__reads = pysam.Samfile(self.__filename, "rb")
+    else:
+      self.__reads = pysam.Samfile(self.__filename)
+
+    self.__source = self.__reads # file which pairs are fetched from
+    self.__coverageReads = None # file which reads of exact coverage are fetched from, opened on first fetch
     self.__refgenome = refgenome
-    self.__bwa = Bwa()
+    self.__referenceCache = ReferenceCache(refgenome)
+    self.__bwa = Bwa(Settings.CACHE_PATH or refgenome.filename + Bwa.CACHE_SUFFIX)
+    self.__checksum = referenceChecksum(refgenome.filename)
+    self.__mateBuffer = MateBuffer(self, Settings.MATE_DISTANCE)
+    self.__collatedPairs = CollatedPairs(self.__reads) if Settings.COLLATED else None
+    self.__bwaStream = BwaStream(Settings.THREADS, Read.parseSamSplit)
+    self.__localAligner = LocalAligner(self.fetchReference, self.__reads.lengths)
     self.__splitParts = {}
+    self.__releasedParts = None # temporary file with remapped parts of released pairs, saved with statistics
+    self.__remappedParts = {}
+    self.__bwaQnames = {} # contig: names of reads with sequences in running pipeline
+    self.__pendingSplits = []
+    self.__splitGroups = SplitGroups()
+    self.__consensusGroups = {}
+    self.__consensusCount = 0
+    self.__localRemapped = 0
+    self.__bwaRemapped = 0
+    self.__plainPairs = 0
+    self.__evidenceReads = 0
+    self.__hasEvidence = False
 
     self.__minInsertSize = Settings.MIN_INSERT
     self.__maxInsertSize = Settings.MAX_INSERT
     self.__countInsertSize = not (self.__minInsertSize and self.__maxInsertSize)
+    self.__insertSizes = []
 
     self.__minCoverage = Settings.MIN_COVERAGE
     self.__maxCoverage = Settings.MAX_COVERAGE
-    self.__coverage = dict((ref, {}) for ref in range(self.__reads.nreferences))
+    self.__coverage = [None] * self.__reads.nreferences # arrays are created with first read of reference
+    self.__windows = [[] for length in self.__reads.lengths] # windows waiting for adding into coverage
     self.__countCoverage = not (self.__minCoverage and self.__maxCoverage)
-    self.__gcContent = {}
+    self.__gcTrack = None
+    self.__gcCoefficients = None # coefficients of GC contents which repair passed windows in streaming mode
+    self.__readIndex = ReadIndex(self.__reads.lengths)
+    self.__remapped = False
+    self.__frontier = None
+
+    if statistics is None and Settings.PROFILE:
+      statistics = self.__loadProfile()
+
+    self.__loaded = statistics is not None
+    self.__coverageReady = self.__loaded # pairs can be returned before the end of reading
+    self.__spanReference = statistics['span'][0] if self.__loaded else Settings.REFERENCE
+
+    if self.__loaded: # use counted statistics
+      (self.__minInsertSize, self.__maxInsertSize) = statistics['insert']
+      (self.__minCoverage, self.__maxCoverage) = statistics['coverage']
+      self.__coverage = statistics['windows']
+      self.__countInsertSize = False
+      self.__countCoverage = False
+
+      if statistics['parts'] is not None and self.__coversRegion(statistics['span']): # split reads of region are remapped
+        self.__splitParts = statistics['parts']
+        self.__remapped = True
+
+      if statistics['evidence'] and not Settings.COLLATED: # pairs are fetched only from side file
+        try:
+          self.__source = pysam.Samfile(self.__filename + Sample.EVIDENCE_SUFFIX)
+          self.__hasEvidence = True
+        except (IOError, OSError, ValueError): # side file was removed
+          pass
 
     # set references on methods which are based on policy
     if Settings.POLICY == Read.ptype.FR:
@@ -53,10 +132,83 @@ class Sample:
       Paired._readStrand = False
       Paired._mateStrand = True
 
+  def __profileKey(self):
+    """
+    Return key of saved statistics from file and settings which affect them
+    """
+    files = tuple((os.path.abspath(filename), os.stat(filename).st_size, os.stat(filename).st_mtime) for filename in self.__filenames)
+    return (files, self.__checksum,
+            Settings.POLICY, Settings.MIN_QUALITY, Settings.MIN_PART_LENGTH,
+            Settings.WINDOW_SIZE, Settings.MIN_COVERAGE, Settings.MAX_COVERAGE, Settings.COVERAGE_CORE, Settings.MIN_COVERAGE_COUNT,
+            Settings.MIN_INSERT, Settings.MAX_INSERT, Settings.INSERT_READS, Settings.INSERT_CORE, Settings.MIN_INSERT_COUNT)
+
+  def __coversRegion(self, span):
+    """
+    Test if span (reference, start, end) of saved statistics covers specified region
+    """
+    (reference, start, end) = span
+    return (reference is None or reference == Settings.REFERENCE) and \
+           (start is None or (Settings.START is not None and start <= Settings.START)) and \
+           (end is None or (Settings.END is not None and Settings.END <= end))
+
+  def __loadProfile(self):
+    """
+    Load statistics saved next to file or return None if they don't exist or don't match file and settings
+      Header with key is read first, so statistics of other file or settings aren't unpickled
+    """
+    try:
+      with open(self.__filename + Sample.PROFILE_SUFFIX, 'rb') as profile:
+        if cPickle.load(profile) != (Sample.PROFILE_VERSION, self.__profileKey()):
+          return None
+
+        statistics = cPickle.load(profile)
+
+        while statistics['parts'] is not None: # remapped parts of pairs released in streaming mode
+          try:
+            statistics['parts'].update(cPickle.load(profile))
+          except EOFError:
+            break
+    except Exception: # missing, unreadable or damaged file
+      return None
+
+    if statistics['span'][0] is not None and statistics['span'][0] != Settings.REFERENCE: # counted on other reference
+      return None
+
+    return statistics
+
+  def __saveProfile(self):
+    """
+    Save statistics next to file for next runs, nothing is saved if directory isn't writable
+      Remapped parts of pairs released in streaming mode are copied after statistics
+    """
+    if not Settings.PROFILE:
+      return
+
+    filename = self.__filename + Sample.PROFILE_SUFFIX
+    temporary = None
+
+    try:
+      (descriptor, temporary) = tempfile.mkstemp(prefix=os.path.basename(filename), dir=os.path.dirname(os.path.abspath(filename)))
+
+      with os.fdopen(descriptor, 'wb') as profile:
+        cPickle.dump((Sample.PROFILE_VERSION, self.__profileKey()), profile, cPickle.HIGHEST_PROTOCOL)
+        cPickle.dump(self.exportStatistics(), profile, cPickle.HIGHEST_PROTOCOL)
+
+        if self.__remapped and self.__releasedParts is not None: # parts of released pairs follow
+          self.__releasedParts.seek(0)
+          shutil.copyfileobj(self.__releasedParts, profile)
+
+      os.chmod(temporary, 0644)
+      os.rename(temporary, filename) # readers see only whole file
+    except (IOError, OSError):
+      if temporary and os.path.exists(temporary):
+        os.remove(temporary)
+
   def __countInterval(self, values, core, minCount):
     """
     Count interval of allowed values
     """
+    values = numpy.asarray(values)
     allCount = len(values)
     allHalf = int(allCount / 2)
     coreCount = max(minCount, int(allCount * core))
@@ -65,199 +217,624 @@ class Sample:
       coreValues = values
     else: # create core from middle of values
       coreHalf = int(math.ceil(coreCount / 2.0))
-      coreValues = sorted(values)[allHalf-coreHalf:allHalf+coreHalf]
+      coreValues = numpy.sort(values)[allHalf-coreHalf:allHalf+coreHalf]
 
-    count = float(len(coreValues))
-
-    if not count:
+    if not len(coreValues):
       return 0, 0
 
-    average = sum(coreValues) / count
-    tmpStdSum = sum([pow(x-average, 2) for x in coreValues])
-    std3 = math.sqrt(tmpStdSum / count) * 3
+    average = coreValues.mean()
+    std3 = coreValues.std() * 3
     return int(math.ceil(average - std3)), int(math.floor(average + std3))
 
-  def __addGCcontent(self, reference, start, end):
+  def __countGcCoefficients(self, gcContent, coverages):
+    """
+    Return coefficients of GC contents, which move coverages of windows with the same GC content to median of all coverages
+    """
+    median = findMedian(numpy.sort(coverages))
+    return dict((gc, median / float(findMedian(numpy.sort(coverages[gcContent == gc])))) for gc in numpy.unique(gcContent))
+
+  def __repairCoverages(self, references, windows):
+    """
+    Count coefficients of GC contents from covered windows of references and return repaired coverages of windows
+    """
+    allCoverages = numpy.concatenate([self.__coverage[ref][w] for ref, w in zip(references, windows)] + [numpy.zeros(0, numpy.int32)])
+
+    if not len(allCoverages): # coverage values exist
+      return None
+
+    if self.__gcTrack is None:
+      self.__gcTrack = GcTrack(self.__refgenome, Settings.WINDOW_SIZE)
+
+    gcContent = numpy.concatenate([self.__gcTrack.getContig(self.getRefName(ref))[w] for ref, w in zip(references, windows)])
+    self.__gcCoefficients = self.__countGcCoefficients(gcContent, allCoverages)
+    coverages = numpy.empty(len(allCoverages), numpy.int32)
+
+    for gc, coeficient in self.__gcCoefficients.items(): # repair all windows with same GC content
+      mask = gcContent == gc
+      coverages[mask] = numpy.floor(allCoverages[mask] * coeficient + 0.5)
+
+    if self.__countCoverage:
+      (self.__minCoverage, self.__maxCoverage) = self.__countInterval(coverages, Settings.COVERAGE_CORE, Settings.MIN_COVERAGE_COUNT)
+
+    return coverages
+
+  def __estimateCoverage(self, tid, position):
     """
-    Add GC content into dict or create new one
+    Estimate coverage from windows passed by cursor (tid, position) in streaming mode
+      Coverage of windows is repaired when it is needed, until all windows are repaired at the end of reading
     """
-    sequence = self.fetchReference(reference, start, end)
-    gcCount = len(Sample.reGCcontent.findall(sequence))
-    atCount = end - start - gcCount
-    gcContent = int(round(gcCount / (gcCount + atCount + 0.0) * 100))
-    self.__gcContent[gcContent] = self.__gcContent.get(gcContent, []) + [(reference, start)]
+    self.__flushCoverage()
+    references = [ref for ref in range(tid + 1) if self.__coverage[ref] is not None]
+    windows = [numpy.flatnonzero(self.__coverage[ref][:None if ref < tid else position // Settings.WINDOW_SIZE]) for ref in references]
+    self.__repairCoverages(references, windows)
+    self.__coverageReady = True
 
   def __repairGCcontent(self):
     """
     Repair coverage form GC content
     """
-    allCoverages = []
+    self.__flushCoverage()
+    references = [ref for ref, coverage in enumerate(self.__coverage) if coverage is not None]
+    windows = [numpy.flatnonzero(self.__coverage[ref]) for ref in references]
+    coverages = self.__repairCoverages(references, windows)
+    self.__gcCoefficients = None # windows are repaired
+    self.__coverageReady = True
+
+    if coverages is None:
+      return
 
-    for values in self.__coverage.values(): # get all coverage values
-      allCoverages.extend(values.values())
+    offset = 0
 
-    if not len(allCoverages): # coverage values exist
-      return
+    for ref, w in zip(references, windows): # store repaired values
+      self.__coverage[ref][w] = coverages[offset:offset+len(w)]
+      offset += len(w)
+
+  def __flushCoverage(self, reference=None):
+    """
+    Add buffered windows into coverage arrays
+    """
+    for ref in (range(len(self.__coverage)) if reference is None else [reference]):
+      if self.__windows[ref]:
+        if self.__coverage[ref] is None: # first windows of reference
+          self.__coverage[ref] = numpy.zeros(self.__reads.lengths[ref] // Settings.WINDOW_SIZE + 1, numpy.int32)
 
-    coverages = []
-    median = findMedian(sorted(allCoverages))
+        coverage = self.__coverage[ref]
+        coverage += numpy.bincount(numpy.array(self.__windows[ref]), minlength=len(coverage)).astype(numpy.int32)
+        self.__windows[ref] = []
 
-    for windows in self.__gcContent.values(): # repair GC content for all windows
-      values = []
+  def __addCoverage(self, read):
+    """
+    Add read into buffered window of coverage
+    """
+    self.__windows[read.tid].append(read.pos // Settings.WINDOW_SIZE)
 
-      for ref, pos in windows: # get median of all windows with same GC content
-        values.append(self.__coverage[ref][pos])
+    if len(self.__windows[read.tid]) == Sample.WINDOW_BUFFER: # add whole buffer at once
+      self.__flushCoverage(read.tid)
 
-      coeficient = median / float(findMedian(sorted(values)))
+  def __addPairCoverage(self, paired):
+    """
+    Add coverage of paired reads
+    """
+    if paired.isSingle():
+      self.__addCoverage(paired.read)
+    elif paired.isPlain():
+      self.__addCoverage(paired.read)
+      self.__addCoverage(paired.mate)
+    else:
+      self.__addCoverage(paired.read.sam)
+      self.__addCoverage(paired.mate.sam)
+
+  def __addInsertSize(self, paired):
+    """
+    Add insert size of properly aligned reads and estimate interval when there is enough of them
+    """
+    size = paired.size()
 
-      for ref, pos in windows: # repair each window with same GC content
-        c = int(round(self.__coverage[ref][pos] * coeficient))
-        self.__coverage[ref][pos] = c
-        coverages.append(c)
+    if size and paired.isNormal(): # must be normal paired with size > 0
+      self.__insertSizes.append(size)
 
-    self.__gcContent.clear()
+      if len(self.__insertSizes) == Settings.INSERT_READS: # check limit
+        self.__estimateInterval()
 
-    if self.__countCoverage:
-      (self.__minCoverage, self.__maxCoverage) = self.__countInterval(coverages, Settings.COVERAGE_CORE, Settings.MIN_COVERAGE_COUNT)
+  def __estimateInterval(self):
+    """
+    Estimate interval of insert size of properly aligned reads and remap split reads waiting for it
+    """
+    (self.__minInsertSize, self.__maxInsertSize) = self.__countInterval(self.__insertSizes, Settings.INSERT_CORE, Settings.MIN_INSERT_COUNT)
+    self.__countInsertSize = False
+    self.__insertSizes = []
 
-  def __addCoverage(self, read):
+    for readRef in self.__pendingSplits:
+      self.__groupSplits(readRef)
+
+    self.__pendingSplits = []
+
+  def __addSplitRead(self, paired):
+    """
+    Store mapped parts of split read and remap its soft-clipped sequences
+      Remapping waits for insert size, which sets window of local alignment
+    """
+    readRef = paired.read if paired.isReadSplit() else paired.mate
+    self.__splitParts[readRef.sam.qname] = self.__splitParts.get(readRef.sam.qname, []) + readRef.getMappedParts()
+
+    if self.__countInsertSize:
+      self.__pendingSplits.append(readRef)
+    else:
+      self.__groupSplits(readRef)
+
+    return readRef
+
+  def __groupSplits(self, readRef):
+    """
+    Add soft-clipped sequences of read into groups by breakpoint
     """
-    Add coverage into window or create new one
+    for split in readRef.getSplits():
+      self.__splitGroups.add(readRef, split)
+
+  def __remapSequence(self, readRef, fastq, sequence):
+    """
+    Align sequence near read or send it to bwa if there isn't local hit, return part only for local hit
     """
-    position = self.getWindow(read.pos)
+    part = self.__localAligner.align(readRef.tid, readRef.pos, readRef.end, sequence, self.__maxInsertSize)
+
+    if part: # local hit
+      self.__localRemapped += 1
+      return part
 
-    if position in self.__coverage[read.tid]: # add
-      self.__coverage[read.tid][position] += 1
-    else: # new
-      self.__coverage[read.tid][position] = 1
-      self.__addGCcontent(read.tid, position, position + Settings.WINDOW_SIZE)
+    if not self.__bwaStream.isOpen(readRef.reference): # start remapping against reference
+      contig = readRef.reference
+      fetch = lambda start, end: self.__refgenome.fetch(reference=contig, start=start, end=end)
+      self.__bwaStream.open(contig, self.__bwa.cachedIndex(contig, self.__reads.lengths[readRef.tid], fetch))
+
+    self.__bwaStream.write(readRef.reference, fastq)
+    self.__bwaRemapped += 1
+    return None
+
+  def __fanOut(self, part, left, length, members):
+    """
+    Save remapped part of consensus for each member of group
+    """
+    for readRef, split in members:
+      self.__remappedParts.setdefault(readRef.sam.qname, []).append((split[0], SplitGroups.fanOut(part, left, length, split)))
 
-  def __estimateCoverage(self):
+  def __remapSplitGroups(self, keep=None, before=None):
     """
-    Count depth of coverages
+    Remap groups of soft-clipped sequences except groups of reference keep which aren't before position
+      Only consensus of group is remapped, members far from consensus are remapped alone
     """
-    for paired in self.fetchPairs(Settings.REFERENCE):
-      if paired.isSingle():
-        self.__addCoverage(paired.read)
+    for left, members in self.__splitGroups.pop(keep, before):
+      if len(members) == 1: # nothing to join
+        (inliers, outliers) = ([], members)
       else:
-        self.__addCoverage(paired.read.sam)
-        self.__addCoverage(paired.mate.sam)
+        (sequence, quality, inliers, outliers) = SplitGroups.consensus(left, members)
 
-  def __estimateInterval(self):
+      for readRef, split in outliers:
+        part = self.__remapSequence(readRef, readRef.getFastqSplits([split]), split[1])
+
+        if part:
+          self.__remappedParts.setdefault(readRef.sam.qname, []).append((split[0], part))
+        else: # wait for bwa
+          self.__bwaQnames.setdefault(readRef.reference, set()).add(readRef.sam.qname)
+
+      if inliers:
+        name = "%s%d" % (Sample.CONSENSUS_NAME, self.__consensusCount)
+        self.__consensusCount += 1
+        part = self.__remapSequence(inliers[0][0], Read.formatFastqSplit(name, 0, True, sequence, quality), sequence)
+
+        if part:
+          self.__fanOut(part, left, len(sequence), inliers)
+        else: # wait for bwa
+          self.__consensusGroups[name] = (left, len(sequence), inliers)
+          self.__bwaQnames.setdefault(inliers[0][0].reference, set()).update(readRef.sam.qname for readRef, split in inliers)
+
+  def __remapping(self, keep=None, before=None):
     """
-    Estimate interval of insert size of properly aligned reads
+    Wait for remapping and insert remapped parts between mapped parts
+      Groups of reference keep which aren't before position are remapped later, bwa of reference keep isn't waited for
     """
-    insertSizes = []
-    count = 0
+    self.__remapSplitGroups(keep, before)
+    contig = None if keep is None else self.getRefName(keep)
+    self.__bwaStream.close(contig)
+
+    for qname, parts in self.__bwaStream.popParts().items(): # join with local hits
+      if qname in self.__consensusGroups:
+        (left, length, members) = self.__consensusGroups.pop(qname)
+        self.__fanOut(parts[0][1], left, length, members)
+      else:
+        self.__remappedParts.setdefault(qname, []).extend(parts)
 
-    for paired in self.fetchPairs(Settings.REFERENCE):
-      size = paired.size()
+    for qname, parts in self.__remappedParts.items():
+      for index, part in sorted(parts, key=lambda p: p[0]):
+        self.__splitParts[qname].insert(index, part)
 
-      if size and paired.isNormal(): # must be normal paired with size > 0
-        insertSizes.append(size)
-        count += 1
+    self.__remappedParts.clear()
+    self.__bwaQnames = dict((c, qnames) for c, qnames in self.__bwaQnames.items() if c == contig and self.__bwaStream.isOpen(c))
+
+  def __releaseSplits(self, splits, cursor):
+    """
+    Remap split reads passed by cursor and return their pairs, other pairs are left in splits
+      Pairs waiting for bwa of reference of cursor are held until its end, released pairs don't keep their parts
+    """
+    self.__remapping(cursor.tid, cursor.pos)
+    waiting = self.__bwaQnames.get(self.getRefName(cursor.tid), ())
+    released = []
+    releasedParts = {}
+    held = []
+
+    for read, mate, readRef in splits:
+      if (readRef.tid != cursor.tid or readRef.end < cursor.pos) and read.qname not in waiting: # all groups of read were remapped
+        releasedParts[read.qname] = self.__splitParts.pop(read.qname, [])
+        paired = Paired(read, mate, self.__reads.lengths, self.__reads.references, releasedParts[read.qname])
+
+        if not paired.isFiltered():
+          released.append(paired)
+      else:
+        held.append((read, mate, readRef))
+
+    if Settings.PROFILE and releasedParts: # parts are saved with statistics
+      if self.__releasedParts is None:
+        self.__releasedParts = tempfile.TemporaryFile()
+
+      cPickle.dump(releasedParts, self.__releasedParts, cPickle.HIGHEST_PROTOCOL)
 
-        if count == Settings.INSERT_READS: # check limit
-          break
+    splits[:] = held
+    return released
 
-    (self.__minInsertSize, self.__maxInsertSize) = self.__countInterval(insertSizes, Settings.INSERT_CORE, Settings.MIN_INSERT_COUNT)
+  def __setFrontier(self, read, splits):
+    """
+    Set position of first read of the earliest pair which can be returned yet
+    """
+    self.__frontier = (read.tid, read.pos)
+
+    if splits:
+      self.__frontier = min(self.__frontier, (splits[0][0].tid, splits[0][0].pos))
+
+  def __overlapRegion(self, read):
+    """
+    Test if read overlaps specified region
+    """
+    return (Settings.REFERENCE is None or Settings.REFERENCE == self.getRefName(read.tid)) and \
+           (Settings.START is None or Settings.START < Read.calculateEnd(read)) and \
+           (Settings.END is None or read.pos < Settings.END)
+
+  def __classifyMates(self, mates):
+    """
+    Return pairs of reads with plain paired reads classified in batches or None if pair must be classified by Paired
+    """
+    if not Settings.BATCH:
+      for read, mate in mates:
+        yield read, mate, None
+
+      return
+
+    pairs = []
+
+    for pair in mates:
+      pairs.append(pair)
+
+      if len(pairs) == Sample.BATCH_PAIRS: # classify whole batch at once
+        for classified in PairBatch(pairs):
+          yield classified
+
+        pairs = []
+
+    for classified in PairBatch(pairs):
+      yield classified
+
+  def __classifyPlain(self, paired):
+    """
+    Return plain paired reads only if their insert size is in interval, otherwise they are classified by Paired
+    """
+    if not paired.isPlain():
+      return paired
+    elif self.__minInsertSize <= paired.actualSize() <= self.__maxInsertSize: # only SNPs and indels
+      self.__plainPairs += 1
+      return paired
+
+    (read, mate) = paired.pair
+    return Paired(read, mate, self.__reads.lengths, self.__reads.references, [])
+
+  def __openEvidence(self):
+    """
+    Return temporary side file for evidence-bearing reads with its name or None if it can't be written
+    """
+    temporary = None
+
+    try:
+      (descriptor, temporary) = tempfile.mkstemp(prefix=os.path.basename(self.__filename), suffix=".bam", dir=os.path.dirname(os.path.abspath(self.__filename)))
+      os.close(descriptor)
+      return pysam.Samfile(temporary, "wb", header=self.__reads.header), temporary
+    except (IOError, OSError, ValueError):
+      if temporary and os.path.exists(temporary):
+        os.remove(temporary)
+
+      return None
+
+  def __isEvidence(self, paired):
+    """
+    Test if pair of reads can be evidence of any variation, concordant pairs are kept while insert size isn't estimated
+    """
+    if paired.isPlain():
+      if self.__countInsertSize or not (self.__minInsertSize <= paired.actualSize() <= self.__maxInsertSize):
+        return True
+
+      return Read.hasMismatches(paired.read) or Read.hasMismatches(paired.mate)
+    elif paired.isSingle():
+      return Read.hasMismatches(paired.read.sam)
+    elif not paired.isNormal() or paired.isRearranged() or paired.isInterchromosomal() or paired.hasOverlap() or \
+         paired.read.isInverted() or paired.mate.isInverted(): # discordant or split reads
+      return True
+    elif self.__countInsertSize or not (self.__minInsertSize <= paired.actualSize() <= self.__maxInsertSize):
+      return True
+
+    return Read.hasMismatches(paired.read.sam) or Read.hasMismatches(paired.mate.sam)
+
+  def __finishEvidence(self, writer, temporary):
+    """
+    Sort and index side file with evidence-bearing reads, next runs fetch pairs from it
+    """
+    writer.close()
+    filename = self.__filename + Sample.EVIDENCE_SUFFIX
+    prefix = temporary + ".sorted"
 
-  def __remapping(self):
+    try:
+      pysam.sort(temporary, prefix)
+      os.chmod(prefix + ".bam", 0644)
+      os.rename(prefix + ".bam", filename)
+      pysam.index(filename)
+      self.__hasEvidence = True
+    except Exception: # sorting or indexing failed
+      if os.path.exists(prefix + ".bam"):
+        os.remove(prefix + ".bam")
+
+    os.remove(temporary)
+
+  def preprocessing(self, chunk=None):
     """
-    Remapping of soft-clipped sequences
+    Fetch paired reads of region in one pass which also counts coverage, insert size and remaps split reads
+      Only pairs of chunk (reference, start, end, first) are fetched in parallel detection, index of its reads is exported
+      Pairs of chunk are in the same order as in region, pairs starting before chunk which isn't first belong to previous chunk
+      Pairs are held until insert size is estimated, pairs with split read until remapping is done
+      With loaded statistics only the region is read, loaded remapped parts are used without remapping
+      Evidence-bearing pairs of whole references are written into side file, which is read instead of file in next runs
+      Groups of soft-clipped sequences are remapped whenever cursor passes them, bwa of reference is waited for after its end
+      In streaming mode split reads are remapped whenever cursor is far from them and reads aren't indexed
+      In streaming mode coverage is estimated from windows passed by cursor, frontier isn't known until then
     """
-    usedFiles = set()
-    readDescriptors = {}
+    waiting = []
+    splits = []
+    scanned = None
+    grouped = None # cursor of last remapping of groups
+    released = None # cursor of last remapping in streaming mode
+    passedWindows = 0 # count of windows of references passed by cursor
+    reference = Settings.REFERENCE
+    (start, end) = (Settings.START, Settings.END) if self.__loaded else (None, None)
+    (since, region) = (None, None)
+    readIndex = None if Settings.STREAMING or self.__hasEvidence else self.__readIndex
+    evidence = None
+
+    if chunk: # mates are collated in whole region
+      (reference, start, end) = chunk[:3]
+      (since, region) = (None if chunk[3] else start, (Settings.REFERENCE, Settings.START, Settings.END))
+
+    if Settings.PROFILE and not Settings.COLLATED and not self.__hasEvidence and start is None and end is None and self.__spanReference == Settings.REFERENCE:
+      evidence = self.__openEvidence()
+
+    for read, mate, plain in self.__classifyMates(self.__fetchMates(reference, start, end, readIndex, since, region)):
+      if read.tid != scanned: # finish remapping against previous references
+        self.__remapSplitGroups(read.tid)
+        self.__bwaStream.close(self.getRefName(read.tid))
+        passedWindows += 0 if scanned is None else self.__reads.lengths[scanned] // Settings.WINDOW_SIZE + 1
+        (scanned, grouped) = (read.tid, read.pos)
+      elif not Settings.STREAMING and Sample.REMAP_STEP <= read.pos - grouped: # groups passed by cursor are complete, bwa aligns them while reads are read
+        self.__remapSplitGroups(read.tid, read.pos)
+        grouped = read.pos
+
+      if Settings.STREAMING and not self.__coverageReady and Sample.COVERAGE_WINDOWS <= passedWindows + read.pos // Settings.WINDOW_SIZE: # enough passed windows
+        self.__estimateCoverage(read.tid, read.pos)
+
+      if Settings.STREAMING and splits and not self.__countInsertSize and \
+         (released is None or released[0] != read.tid or Sample.STREAMING_STEP <= read.pos - released[1]): # release passed split reads
+        released = (read.tid, read.pos)
+
+        for ready in self.__releaseSplits(splits, read):
+          yield ready
+
+      paired = plain or Paired(read, mate, self.__reads.lengths, self.__reads.references, [])
+
+      if paired.isFiltered():
+        continue
+
+      if not self.__loaded:
+        self.__addPairCoverage(paired)
+
+      if self.__countInsertSize:
+        self.__addInsertSize(paired)
+
+      if evidence and self.__isEvidence(paired): # keep in side file
+        for sam in (read, mate) if mate else (read,):
+          evidence[0].write(sam)
+          self.__evidenceReads += 1
+
+      if not self.__overlapRegion(read) and not (mate and self.__overlapRegion(mate)): # only statistics
+        continue
+      elif self.__remapped and (paired.isReadSplit() or paired.isMateSplit()): # loaded remapped parts
+        paired = Paired(read, mate, self.__reads.lengths, self.__reads.references, self.__splitParts.get(read.qname, []))
+        self.__setFrontier(read, splits)
+
+        if not paired.isFiltered():
+          yield paired
+      elif paired.isReadSplit() or paired.isMateSplit(): # wait for remapping
+        splits.append((read, mate, self.__addSplitRead(paired)))
+      elif self.__countInsertSize: # wait for insert size
+        waiting.append(paired)
+      else:
+        for ready in waiting:
+          yield self.__classifyPlain(ready)
+
+        waiting = []
+        self.__setFrontier(read, splits)
+        yield self.__classifyPlain(paired)
+
+    if readIndex is not None and not chunk: # reads were indexed while they were read, index of chunk is exported
+      if Settings.REFERENCE is None or self.__collatedPairs: # all references were read
+        self.__readIndex.finish(range(self.__reads.nreferences))
+      else:
+        self.__readIndex.finish([self.getRefIndex(Settings.REFERENCE)], start, end)
 
-    for ref in self.__reads.references: # create tmo FASTQ files
-      readname = "%s%s" % (Sample.FILENAME_TEMPLATE, ref)
-      readFile = open("%s.fastq" % readname, 'w')
-      readDescriptors[ref] = readFile
+    if evidence:
+      self.__finishEvidence(*evidence)
 
-    for paired in self.fetchPairs(Settings.REFERENCE, Settings.START, Settings.END): # fetch split reads for remapping
-      if paired.isReadSplit() or paired.isMateSplit():
-        readRef = paired.read if paired.isReadSplit() else paired.mate
-        readDescriptors[readRef.reference].write(readRef.getFastqSplits())
-        usedFiles.add(readRef.reference)
-        self.__splitParts[readRef.sam.qname] = self.__splitParts.get(readRef.sam.qname, []) + readRef.getMappedParts()
+    if self.__countInsertSize: # not enough reads for limit
+      self.__estimateInterval()
 
-    for readFile in readDescriptors.values(): # close FASTQ files
-      readFile.close()
+    for ready in waiting:
+      yield self.__classifyPlain(ready)
 
-    for ref in usedFiles: # do remapping
-      actualRef = "%s%s" % (Sample.FILENAME_TEMPLATE, ref)
+    if not self.__remapped:
+      self.__remapping()
+      self.__remapped = True
 
-      with open("%s.fasta" % actualRef, 'w') as refFile: # create file with actual reference
-        rindex = self.getRefIndex(ref)
-        refFile.write(">%s\n" % ref)
-        refFile.write(self.fetchReference(rindex, 0, self.__reads.lengths[rindex]))
+    waiting = []
 
-      self.__bwa.index(actualRef)
-      self.__bwa.align(actualRef)
+    for read, mate, readRef in splits: # pairs with remapped split parts
+      paired = Paired(read, mate, self.__reads.lengths, self.__reads.references, self.__splitParts.get(read.qname, []))
 
-      with pysam.Samfile("%s.sam" % actualRef) as splitsam:
-        for read in splitsam.fetch(): # save remapped parts
-          name = read.qname.split(Read.COUNT_SEPARATOR)
-          self.__splitParts[name[0]].insert(int(name[1]), SplitPart(read.pos,
-                                                                    read.seq,
-                                                                    read.cigar,
-                                                                    read.mapq,
-                                                                    read.is_reverse,
-                                                                    read.is_unmapped,
-                                                                    True))
+      if not paired.isFiltered():
+        waiting.append(paired)
 
-      for f in glob.glob("%s*" % actualRef): # remove temporary files
-        os.remove(f)
+    if not self.__loaded:
+      self.__repairGCcontent()
+      self.__saveProfile()
+    elif evidence and self.__hasEvidence: # mark side file in saved statistics
+      self.__saveProfile()
 
-    for f in glob.glob("%s*" % Sample.FILENAME_TEMPLATE): # remove unused temporary FASTQ files
-      os.remove(f)
+    for ready in waiting:
+      yield ready
 
-  def preprocessing(self):
+  def countStatistics(self, reference, start, end):
     """
-    Count and repair coverage from GC content and count insert length's statistics
+    Count insert sizes and coverage windows of pairs whose first read starts in chunk of reference
+      Pair with first read on reference which isn't read belongs to chunk of the other read
     """
-    self.__remapping()
+    rindex = self.getRefIndex(reference)
+    insertSizes = []
+
+    for read, mate, plain in self.__classifyMates(self.__fetchMates(reference, start, end)):
+      first = mate if mate and Paired.isFirst(mate, read) else read
+
+      if Settings.REFERENCE is not None and Settings.REFERENCE != self.getRefName(first.tid): # first read isn't read
+        first = read if first is mate else mate
+
+      if first.tid != rindex or not (start <= first.pos < end): # belongs to other chunk
+        continue
+
+      paired = plain or Paired(read, mate, self.__reads.lengths, self.__reads.references, [])
+
+      if paired.isFiltered():
+        continue
+
+      self.__addPairCoverage(paired)
+      size = paired.size()
+
+      if size and paired.isNormal() and len(insertSizes) < Settings.INSERT_READS:
+        insertSizes.append(size)
 
+    self.__flushCoverage()
+    windows = []
+
+    for ref, coverage in enumerate(self.__coverage): # only covered windows
+      if coverage is not None:
+        w = numpy.flatnonzero(coverage)
+        windows.append((ref, w, coverage[w]))
+
+    self.__coverage = [None] * self.__reads.nreferences # next chunk starts with empty coverage
+    return insertSizes, windows
+
+  def mergeStatistics(self, results):
+    """
+    Merge statistics counted in chunks in order of chunks and repair coverage
+    """
     if self.__countInsertSize:
+      for insertSizes, windows in results:
+        self.__insertSizes.extend(insertSizes)
+
+      self.__insertSizes = self.__insertSizes[:Settings.INSERT_READS]
       self.__estimateInterval()
 
-    self.__estimateCoverage()
+    for insertSizes, windows in results:
+      for ref, w, counts in windows:
+        if self.__coverage[ref] is None: # first windows of reference
+          self.__coverage[ref] = numpy.zeros(self.__reads.lengths[ref] // Settings.WINDOW_SIZE + 1, numpy.int32)
+
+        self.__coverage[ref][w] += counts
+
     self.__repairGCcontent()
+    self.__countCoverage = False
+    self.__loaded = True
+    self.__saveProfile()
 
-  def fetchReference(self, rindex, start, end):
+  def exportStatistics(self):
     """
-    Fetch sequence of reference genome
+    Return statistics for sample of the same file in other process or in next run
+      Remapped parts of split reads are exported only after remapping of region
     """
-    return self.__refgenome.fetch(reference=self.getRefName(rindex), start=start, end=end)
+    return {'insert': (self.__minInsertSize, self.__maxInsertSize),
+            'coverage': (self.__minCoverage, self.__maxCoverage),
+            'windows': self.__coverage,
+            'parts': self.__splitParts if self.__remapped else None,
+            'evidence': self.__hasEvidence,
+            'span': (Settings.REFERENCE, Settings.START, Settings.END)}
+
+  def exportIndex(self):
+    """
+    Return positions of reads indexed in chunk for sample in other process
+    """
+    return self.__readIndex.export()
 
-  def fetchPairs(self, reference=None, start=None, end=None):
+  def importIndex(self, exported, reference, start, end):
     """
-    Fetch paired reads
-      Could also fetch single read if mate is unmapped or read is singleton
+    Use index of reads exported from chunk (reference, start, end) in other process, reads from side file aren't indexed
     """
-    for read in self.__reads.fetch(reference=reference, start=start, end=end):
-      if not read.is_unmapped: # first read must be mapped
-        mate = self.getMate(read)
+    if self.__hasEvidence:
+      return
 
-        # prevent fetching two times same pair
-        if not mate or Paired.isFirst(read, mate) or self.readOutOfRegion(reference, start, end, mate):
-          paired = Paired(read, mate, self.__reads.lengths, self.__reads.references, self.__splitParts.get(read.qname, []))
+    self.__readIndex.merge(exported)
+    self.__readIndex.finish([self.getRefIndex(reference)], start, end)
 
-          if not paired.isFiltered():
-            yield paired
+  def fetchReference(self, rindex, start, end):
+    """
+    Fetch sequence of reference genome, short sequences are sliced from cached blocks
+    """
+    return self.__referenceCache.fetch(self.getRefName(rindex), start, end)
 
-  def fetchTuplePairs(self, reference=None, start=None, end=None):
+  def __fetchMates(self, reference, start, end, readIndex=None, since=None, region=None):
     """
-    Fetch paired reads as Read instances rather than as Paired instance
-      Fetch also low quality reads, first read unmapped
+    Fetch mapped reads with their mates collated from coordinate-sorted file, all reads are added into readIndex
+      Reads starting before since are only indexed, mates out of region (reference, start, end) are seeked, fetched region by default
+      Collated file is read whole with adjacent mates
     """
-    for read in self.__reads.fetch(reference=reference, start=start, end=end):
-      if not read.mate_is_unmapped:
-        mate = self.getMate(read)
+    if self.__collatedPairs and self.__source is self.__reads: # mates are found without index
+      for pair in self.__collatedPairs.fetch(reference, start, end, readIndex):
+        yield pair
+
+      return
+
+    self.__mateBuffer.clear(*(region or (reference, start, end)))
 
-        # prevent fetching two times same pair
-        if not mate or read.is_unmapped or Paired.isFirst(read, mate) or self.readOutOfRegion(reference, start, end, mate):
-          yield Read(read, True, Paired._readStrand, self.__reads.references), Read(mate, False, Paired._mateStrand, self.__reads.references)
+    for read in self.__source.fetch(reference=reference, start=start, end=end):
+      if readIndex:
+        readIndex.add(read)
+
+      if since is not None and read.pos < since: # pair of read was fetched with previous chunk
+        continue
+
+      if not read.is_unmapped:
+        for pair in self.__mateBuffer.add(read):
+          yield pair
+
+    for pair in self.__mateBuffer.flush():
+      yield pair
 
   def readOutOfRegion(self, reference, start, end, read):
     """
@@ -317,29 +894,59 @@ class Sample:
   def getInexactCoverage(self, reference, start, end):
     """
     Return inexact repaired coverage from GC content
+      Windows which aren't repaired yet in streaming mode are repaired by estimated coefficients
     """
-    tid = self.getRefIndex(reference)
-    startPos = self.getWindow(start)
-    endPos = self.getWindow(end) + 1
-    coverage = 0
-    count = 0
+    rindex = self.getRefIndex(reference)
+
+    if self.__windows[rindex]: # reads are read yet
+      self.__flushCoverage(rindex)
+
+    coverage = self.__coverage[rindex]
+    startPos = self.getWindow(start) // Settings.WINDOW_SIZE
+    endPos = self.getWindow(end) // Settings.WINDOW_SIZE + 1
+    count = endPos - startPos
 
-    for i in range(startPos, endPos, Settings.WINDOW_SIZE):
-      coverage += self.__coverage[tid].get(i, 0)
-      count += 1
+    if coverage is None or count <= 0: # without reads
+      return 0
 
-    return int(float(coverage) / count if count > 0 else 0)
+    (first, last) = (max(0, startPos), max(0, min(endPos, len(coverage))))
+    values = coverage[first:last]
+
+    if self.__gcCoefficients is not None: # repair passed windows
+      gcContent = self.__gcTrack.getContig(reference)[first:last]
+      coeficients = numpy.array([self.__gcCoefficients.get(gc, 1.0) for gc in gcContent])
+      values = numpy.floor(values * coeficients + 0.5)
+
+    return int(float(values.sum()) / count)
+
+  def __fetchCoverage(self, reference, start, end):
+    """
+    Fetch reads of reference in interval [start, end) for counting of exact coverage
+      Reads are fetched from another handle, because pairs can be still fetched from file
+    """
+    if self.__coverageReads is None:
+      if len(self.__filenames) > 1:
+        self.__coverageReads = MergedSamfile(self.__filenames)
+      elif self.__filename == "-": # standard input can't be opened again
+        self.__coverageReads = self.__reads
+      else:
+        self.__coverageReads = pysam.Samfile(self.__filename)
+
+    return self.__coverageReads.fetch(reference=self.__reads.references[reference], start=start, end=end)
 
   def getExactCoverage(self, reference, start, end):
     """
     Return exact coverage
     """
-    count = 0
+    count = self.__readIndex.count(reference, start, end)
+
+    if count is not None: # reference was indexed during reading
+      return count
 
-    for read in self.__reads.fetch(reference=self.__reads.references[reference], start=start, end=end+1):
-      r = Read(read, True, True, self.__reads.references)
+    count = 0
 
-      if not r.isUnmapped() and not r.isDuplicate() and r.hasMinQuality():
+    for read in self.__fetchCoverage(reference, start, end + 1):
+      if ReadIndex.isUsable(read):
         count += 1
 
     return count
@@ -349,10 +956,44 @@ class Sample:
     Return mate of read: None if mate is unmapped or read is single
     """
     try:
-      return self.__reads.mate(read)
+      return self.__source.mate(read)
     except ValueError:
       return None
 
+  def getFrontier(self):
+    """
+    Return (tid, position) which isn't passed by first read of any pair returned later
+      None before first pair and before coverage is known
+    """
+    return self.__frontier if self.__coverageReady else None
+
+  def isRemapped(self):
+    """
+    Test if split reads were remapped, pairs with split read are returned last otherwise
+    """
+    return self.__remapped
+
+  def isLoaded(self):
+    """
+    Test if statistics were loaded and don't have to be counted
+    """
+    return self.__loaded
+
+  def getStatistics(self):
+    """
+    Return statistics useful for tuning of settings
+    """
+    return [("Mate buffer peak", self.__mateBuffer.getPeak()),
+            ("Mate seeks", self.__mateBuffer.getSeeks()),
+            ("Soft-clipped parts", self.__splitGroups.getCount()),
+            ("Locally remapped parts", self.__localRemapped),
+            ("Parts remapped by bwa", self.__bwaRemapped),
+            ("Plain pairs", self.__plainPairs),
+            ("Reads written into side file", self.__evidenceReads),
+            ("Sorted chunks of collated pairs", self.__collatedPairs.getChunks() if self.__collatedPairs else 0),
+            ("Reference cache hits", self.__referenceCache.getHits()),
+            ("Reference cache misses", self.__referenceCache.getMisses())]
+
   def getRefSequences(self):
     """
     Return reference sequences from BAM header
@@ -400,3 +1041,9 @@ class Sample:
     """
     self.__refgenome.close()
     self.__reads.close()
+
+    if self.__coverageReads not in (None, self.__reads):
+      self.__coverageReads.close()
+
+    if self.__hasEvidence:
+      self.__source.close()
@@ -0,0 +1,193 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import heapq
+import os
+import pysam
+import tempfile
+
+from Read import Read
+
+class CollatedPairs:
+  """
+  Pairs of reads collated from name-sorted or collated file, returned in order of their first reads
+    Pairs are sorted in chunks held in memory, full chunks are written into temporary files and merged
+    Temporary files are merged in more passes, so only limited count of them is open at once
+  """
+  CHUNK_PAIRS = 200000 # count of pairs sorted in memory
+  SECONDARY = 0x900 # flags of secondary and supplementary alignments
+  MERGED_FILES = 64 # count of temporary files merged at once
+
+  def __init__(self, reads):
+    """
+    Initialize variables
+    """
+    self.__reads = reads
+    self.__chunks = 0
+
+  def __templates(self, readIndex):
+    """
+    Return groups of adjacent reads with the same query name, all reads are added into readIndex
+    """
+    template = []
+
+    for read in self.__reads:
+      if readIndex:
+        readIndex.add(read)
+
+      if template and template[0].qname != read.qname: # next template
+        yield template
+        template = []
+
+      template.append(read)
+
+    if template:
+      yield template
+
+  @staticmethod
+  def __inRegion(read, tid, start, end):
+    """
+    Test if read overlaps region
+    """
+    return (tid is None or read.tid == tid) and \
+           (start is None or start < Read.calculateEnd(read)) and \
+           (end is None or read.pos < end)
+
+  @staticmethod
+  def __pair(template, tid, start, end):
+    """
+    Return pair (read, mate) of mapped reads of template with the first read in region first, None if no read is in region
+    """
+    reads = sorted((read for read in template if not read.is_unmapped and not read.flag & CollatedPairs.SECONDARY),
+                   key=lambda read: (read.tid, read.pos))
+
+    for read in reads:
+      if CollatedPairs.__inRegion(read, tid, start, end):
+        mates = [mate for mate in reads if mate is not read]
+
+        if read.is_paired and not read.mate_is_unmapped and mates:
+          return read, mates[0]
+
+        return read, None
+
+    return None
+
+  def __write(self, chunk):
+    """
+    Write sorted chunk of pairs into temporary file and return its name
+    """
+    (descriptor, filename) = tempfile.mkstemp(suffix=".bam")
+    os.close(descriptor)
+    output = pysam.Samfile(filename, "wb", header=self.__reads.header)
+
+    for read, mate in chunk:
+      output.write(read)
+
+      if mate:
+        output.write(mate)
+
+    output.close()
+    return filename
+
+  @staticmethod
+  def __load(filename):
+    """
+    Return pairs of reads from temporary file
+    """
+    reads = pysam.Samfile(filename)
+    previous = None
+
+    for read in reads:
+      if previous and previous.qname == read.qname: # mate of previous read
+        yield previous, read
+        previous = None
+      else:
+        if previous:
+          yield previous, None
+
+        previous = read
+
+    if previous:
+      yield previous, None
+
+    reads.close()
+
+  @staticmethod
+  def __keyed(pairs, index):
+    """
+    Return pairs with key of their first read, pairs with the same key stay in order of chunks
+    """
+    for order, (read, mate) in enumerate(pairs):
+      yield read.tid, read.pos, index, order, (read, mate)
+
+  @staticmethod
+  def __merge(chunks):
+    """
+    Return pairs of chunks merged in order of their first reads
+    """
+    chunks = [CollatedPairs.__keyed(chunk, index) for index, chunk in enumerate(chunks)]
+
+    for item in heapq.merge(*chunks):
+      yield item[-1]
+
+  def __reduce(self, filenames):
+    """
+    Merge temporary files into fewer files until all of them can be open at once
+    """
+    while len(filenames) > CollatedPairs.MERGED_FILES:
+      merged = []
+
+      try:
+        for index in xrange(0, len(filenames), CollatedPairs.MERGED_FILES):
+          group = filenames[index:index + CollatedPairs.MERGED_FILES]
+          merged.append(self.__write(CollatedPairs.__merge([CollatedPairs.__load(filename) for filename in group])))
+      except:
+        for filename in merged:
+          os.remove(filename)
+
+        raise
+
+      for filename in filenames:
+        os.remove(filename)
+
+      filenames[:] = merged
+
+  def fetch(self, reference=None, start=None, end=None, readIndex=None):
+    """
+    Return pairs of reads with read overlapping region in order of their first reads
+      File is read whole, all reads are added into readIndex
+    """
+    tid = None if reference is None else self.__reads.references.index(reference)
+    chunk = []
+    filenames = []
+
+    try:
+      for template in self.__templates(readIndex):
+        pair = CollatedPairs.__pair(template, tid, start, end)
+
+        if pair:
+          chunk.append(pair)
+
+          if len(chunk) == CollatedPairs.CHUNK_PAIRS: # chunk doesn't fit into memory
+            chunk.sort(key=lambda pair: (pair[0].tid, pair[0].pos))
+            filenames.append(self.__write(chunk))
+            self.__chunks += 1
+            chunk = []
+
+      chunk.sort(key=lambda pair: (pair[0].tid, pair[0].pos))
+      self.__reduce(filenames)
+
+      for pair in CollatedPairs.__merge([CollatedPairs.__load(filename) for filename in filenames] + [chunk]):
+        yield pair
+    finally:
+      for filename in filenames:
+        os.remove(filename)
+
+  def getChunks(self):
+    """
+    Return count of chunks written into temporary files
+    """
+    return self.__chunks
@@ -0,0 +1,139 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import collections
+
+from Paired import Paired
+
+class MateBuffer:
+  """
+  Collates mates of coordinate-sorted reads while they are read from file
+    Pairs are returned in order of their first read, only mates far away are seeked
+  """
+
+  def __init__(self, sample, distance):
+    """
+    Initialize variables
+    """
+    self.__sample = sample
+    self.__distance = distance
+    self.__queue = collections.deque() # items [read, mate, complete] in order of first read
+    self.__pending = {} # items waiting for mate
+    self.__reference = None
+    self.__start = None
+    self.__end = None
+    self.__peak = 0
+    self.__seeks = 0
+
+  def __seek(self, read):
+    """
+    Return mate of read found by seeking in file
+    """
+    self.__seeks += 1
+    return self.__sample.getMate(read)
+
+  def __streamed(self, read):
+    """
+    Test if mate of read is close enough to be collated from stream
+    """
+    return read.tid == read.rnext and \
+           abs(read.pnext - read.pos) <= self.__distance and \
+           (self.__start is None or self.__start <= read.pnext) and \
+           (self.__end is None or read.pnext < self.__end)
+
+  def __append(self, item):
+    """
+    Append item into queue
+    """
+    self.__queue.append(item)
+    self.__peak = max(self.__peak, len(self.__queue))
+
+  def __resolve(self, item):
+    """
+    Complete waiting item by seeking its mate
+    """
+    read = item[0]
+    self.__pending.pop((read.qname, read.is_read1, read.pos), None)
+    item[1] = self.__seek(read)
+    item[2] = True
+
+  def __ready(self):
+    """
+    Return complete pairs from beginning of queue
+    """
+    pairs = []
+
+    while self.__queue and self.__queue[0][2]: # first item is complete
+      item = self.__queue.popleft()
+      pairs.append((item[0], item[1]))
+
+    return pairs
+
+  def clear(self, reference=None, start=None, end=None):
+    """
+    Clear buffer before fetching reads from region
+    """
+    self.__queue.clear()
+    self.__pending.clear()
+    self.__reference = reference
+    self.__start = start
+    self.__end = end
+
+  def add(self, read):
+    """
+    Add mapped read and return pairs which became complete
+    """
+    while self.__queue and not self.__queue[0][2]: # mate of first item can't arrive anymore
+      waiting = self.__queue[0][0]
+
+      if waiting.tid == read.tid and read.pos <= waiting.pnext:
+        break
+
+      self.__resolve(self.__queue[0])
+
+    if not read.is_paired or read.mate_is_unmapped: # without mate
+      self.__append([read, None, True])
+    else:
+      item = self.__pending.pop((read.qname, read.is_read2, read.pnext), None)
+      key = (read.qname, read.is_read1, read.pos)
+
+      if item is not None: # second mate arrived
+        item[1] = read
+        item[2] = True
+      elif self.__streamed(read) and key not in self.__pending:
+        if read.pos <= read.pnext: # wait for mate
+          item = [read, None, False]
+          self.__pending[key] = item
+          self.__append(item)
+      else: # mate is far away
+        mate = self.__seek(read)
+
+        if not mate or Paired.isFirst(read, mate) or self.__sample.readOutOfRegion(self.__reference, self.__start, self.__end, mate):
+          self.__append([read, mate, True])
+
+    return self.__ready()
+
+  def flush(self):
+    """
+    Return all remaining pairs, missing mates are seeked
+    """
+    for item in self.__queue:
+      if not item[2]:
+        self.__resolve(item)
+
+    return self.__ready()
+
+  def getPeak(self):
+    """
+    Return maximal number of reads held in buffer
+    """
+    return self.__peak
+
+  def getSeeks(self):
+    """
+    Return number of mates found by seeking in file
+    """
+    return self.__seeks
@@ -0,0 +1,88 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import numpy
+
+from Paired import Paired
+from PlainPaired import PlainPaired
+from Read import Read
+from src.interface.Settings import Settings
+
+class PairBatch:
+  """
+  Pairs of reads classified at once in columns of arrays
+    Only plain pairs are found out, other pairs must be classified by Paired
+  """
+  DUPLICATE = 0x400 # flag of duplicate read
+  REVERSE = 0x10 # flag of read on reverse strand
+  emptyColumns = (0, 0, 0, 0, 0, 0) # columns of missing mate
+
+  def __init__(self, pairs):
+    """
+    Initialize variables and classify pairs (read, mate)
+    """
+    self.__pairs = pairs
+    self.__swapped = [bool(mate and Paired.isFirst(mate, read)) for read, mate in pairs]
+    rows = []
+
+    for (read, mate), swapped in zip(pairs, self.__swapped):
+      if not mate:
+        rows.append(PairBatch.__columns(read) + PairBatch.emptyColumns + (0, 0))
+      elif swapped:
+        rows.append(PairBatch.__columns(mate) + PairBatch.__columns(read) + (mate.tlen, 1))
+      else:
+        rows.append(PairBatch.__columns(read) + PairBatch.__columns(mate) + (read.tlen, 1))
+
+    (tid1, pos1, end1, mapq1, flag1, operations1,
+     tid2, pos2, end2, mapq2, flag2, operations2, tlen, complete) = numpy.array(rows, numpy.int64).reshape(len(rows), 14).T
+
+    plain = (complete == 1) & (tid1 == tid2) & \
+            PairBatch.__isUsable(mapq1, flag1, operations1) & PairBatch.__isUsable(mapq2, flag2, operations2) & \
+            (((flag1 & PairBatch.REVERSE) != 0) != Paired._readStrand) & \
+            (((flag2 & PairBatch.REVERSE) != 0) != Paired._mateStrand) & \
+            ~((pos1 <= pos2) & (((end1 <= end2) & (pos2 <= end1)) | (end2 <= end1))) # not inverted and without overlap
+    size = tlen - (end1 - pos1) - (end2 - pos2)
+
+    self.__plain = plain.tolist()
+    self.__size = size.tolist()
+    self.__actualSize = numpy.where(size != 0, size, pos2 - end1 - 1).tolist()
+
+  @staticmethod
+  def __columns(read):
+    """
+    Return columns of read with bitmask of operations in CIGAR
+    """
+    operations = 0
+
+    for operator, length in read.cigar or ():
+      operations |= 1 << operator
+
+    return (read.tid, read.pos, Read.calculateEnd(read), read.mapq, read.flag, operations)
+
+  @staticmethod
+  def __isUsable(mapq, flag, operations):
+    """
+    Test which reads have minimal quality, aren't duplicate and don't have gaps
+    """
+    return ((mapq == 0) | (Settings.MIN_QUALITY <= mapq)) & \
+           ((flag & PairBatch.DUPLICATE) == 0) & \
+           ((operations & Read.gapOperations) == 0)
+
+  def __len__(self):
+    """
+    Return count of pairs
+    """
+    return len(self.__pairs)
+
+  def __iter__(self):
+    """
+    Return pairs of reads with plain paired reads or None if pair must be classified by Paired
+    """
+    for index, (read, mate) in enumerate(self.__pairs):
+      if self.__plain[index]:
+        yield read, mate, PlainPaired(read, mate, self.__swapped[index], self.__size[index], self.__actualSize[index])
+      else:
+        yield read, mate, None
@@ -159,6 +159,12 @@ class Paired:
               self.__mate.pos <= self.__read.end) or \
              (self.__mate.end <= self.__read.end))
 
+  def isPlain(self):
+    """
+    Test if reads are plain, which are only reads classified in batch
+    """
+    return False
+
   def isNormal(self):
     """
     Test if reads are normal
@@ -0,0 +1,90 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+class PlainPaired(object):
+  """
+  Represents normal paired reads without inversions and overlap classified in batch
+    Reads are kept as SAM read objects, so they can have only SNPs and indels
+  """
+  __slots__ = ('__pair', '__swapped', '__size', '__actualSize')
+
+  def __init__(self, read, mate, swapped, size, actualSize):
+    """
+    Initialize variables
+    """
+    self.__pair = (read, mate)
+    self.__swapped = swapped
+    self.__size = size
+    self.__actualSize = actualSize
+
+  @property
+  def pair(self):
+    """
+    Return SAM read objects in order they were fetched
+    """
+    return self.__pair
+
+  @property
+  def read(self):
+    """
+    Return SAM read object of first read
+    """
+    return self.__pair[self.__swapped]
+
+  @property
+  def mate(self):
+    """
+    Return SAM read object of mate
+    """
+    return self.__pair[not self.__swapped]
+
+  def size(self):
+    """
+    Return insert size information from read
+    """
+    return self.__size
+
+  def actualSize(self):
+    """
+    Return counted insert size if template length is zero
+    """
+    return self.__actualSize
+
+  def isPlain(self):
+    """
+    Test if reads are plain
+    """
+    return True
+
+  def isNormal(self):
+    """
+    Test if reads are normal
+    """
+    return True
+
+  def isSingle(self):
+    """
+    Test if read is single
+    """
+    return False
+
+  def isReadSplit(self):
+    """
+    Test if read is split
+    """
+    return False
+
+  def isMateSplit(self):
+    """
+    Test if mate is split
+    """
+    return False
+
+  def isFiltered(self):
+    """
+    Test if read is filtered
+    """
+    return False
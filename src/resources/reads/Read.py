@@ -9,14 +9,19 @@ from src.interface.Settings import Settings
 from src.interface.interface import *
 from src.variations.factories.CigarFactory import CigarFactory
 
-class Read:
+class Read(object):
   """
   Represents sequenced read
+    Orientation is found out once, operations of CIGAR are found out on first test
   """
+  __slots__ = ('__read', '__first', '__strand', '__refnames', '__end', '__len', '__reference', '__inverted', '__operations')
   COUNT_SEPARATOR = "_"
   ptype = enum(# policy type
                FR=0, # forward/reverse
                RF=1) # reverse/forward
+  splitOperations = 1 << CigarFactory.op.SOFTCLIP # bitmask of operations of split read
+  gapOperations = (1 << CigarFactory.op.SKIPPED) | (1 << CigarFactory.op.SOFTCLIP) | \
+                  (1 << CigarFactory.op.HARDCLIP) | (1 << CigarFactory.op.PADDING) # bitmask of gaps
 
   def __init__(self, read, first, strand, refnames):
     """
@@ -26,11 +31,13 @@ class Read:
     self.__first = first
     self.__strand = strand
     self.__refnames = refnames
+    self.__operations = None
 
     if not self.isUnmapped():
       self.__end = self.calculateEnd(self.__read)
       self.__len = self.__end - self.__read.pos
       self.__reference = self.__refnames[self.__read.tid]
+      self.__inverted = (not self.__read.is_reverse) != self.__strand
 
   @staticmethod
   def calculateEnd(read):
@@ -45,6 +52,20 @@ class Read:
 
     return 0
 
+  @staticmethod
+  def hasMismatches(read):
+    """
+    Test if read has SNPs or indels in CIGAR string or MD tag
+    """
+    for operator, length in read.cigar or ():
+      if operator in (CigarFactory.op.INSERTION, CigarFactory.op.DELETION):
+        return True
+
+    try:
+      return not read.opt('MD').isdigit()
+    except KeyError: # without MD tag only insertions are found
+      return False
+
   @property
   def sam(self):
     """
@@ -103,20 +124,31 @@ class Read:
     """
     Test if read is inverted
     """
-    return (not self.__read.is_reverse) != self.__strand
+    return self.__inverted
+
+  def __getOperations(self):
+    """
+    Return bitmask of operations in CIGAR
+    """
+    if self.__operations is None:
+      self.__operations = 0
+
+      for operator, length in self.__read.cigar or ():
+        self.__operations |= 1 << operator
+
+    return self.__operations
 
   def isSplit(self):
     """
     Test if read is split
     """
-    return CigarFactory.op.SOFTCLIP in dict(self.__read.cigar)
+    return bool(self.__getOperations() & Read.splitOperations)
 
   def hasGaps(self):
     """
     Test if read has gaps
     """
-    gaps = (CigarFactory.op.SKIPPED, CigarFactory.op.SOFTCLIP, CigarFactory.op.HARDCLIP, CigarFactory.op.PADDING)
-    return set(dict(self.__read.cigar)).intersection(gaps)
+    return bool(self.__getOperations() & Read.gapOperations)
 
   def hasMinQuality(self):
     """
@@ -163,31 +195,80 @@ class Read:
 
     return parts
 
-  def getFastqSplits(self):
+  def getSplits(self):
     """
-    Return read's split parts in FASTQ format
+    Return read's split parts as (index of CIGAR operation, sequence, quality)
     """
     count = 0
     start = 0
     end = 0
-    value = ''
+    splits = []
 
     for operator, length in self.__read.cigar:
       if operator != CigarFactory.op.SOFTCLIP:
         start += length
       else:
         end = start + length
-        value += '@%s%s%d/%d\n%s\n+\n%s\n' % (self.__read.qname,
-                                              Read.COUNT_SEPARATOR,
-                                              count,
-                                              1 if self.__first else 2,
-                                              self.__read.seq[start:end],
-                                              self.__read.qual[start:end])
+        splits.append((count, self.__read.seq[start:end], self.__read.qual[start:end]))
 
       count += 1
 
+    return splits
+
+  def getFastqSplits(self, splits=None):
+    """
+    Return read's split parts in FASTQ format, all parts if splits aren't specified
+    """
+    value = ''
+
+    for count, seq, qual in (self.getSplits() if splits is None else splits):
+      value += Read.formatFastqSplit(self.__read.qname, count, self.__first, seq, qual)
+
     return value
 
+  @staticmethod
+  def formatFastqSplit(qname, count, first, seq, qual):
+    """
+    Return split part in FASTQ format
+    """
+    return '@%s%s%d/%d\n%s\n+\n%s\n' % (qname, Read.COUNT_SEPARATOR, count, 1 if first else 2, seq, qual)
+
+  @staticmethod
+  def parseCigar(cigar):
+    """
+    Parse CIGAR string into list of operations
+    """
+    operations = []
+    length = ''
+
+    if cigar == '*':
+      return operations
+
+    for char in cigar:
+      if char.isdigit():
+        length += char
+      else:
+        operations.append((CigarFactory.abbr.index(char), int(length)))
+        length = ''
+
+    return operations
+
+  @staticmethod
+  def parseSamSplit(line):
+    """
+    Return (query name, index of CIGAR operation, part) of split part remapped into SAM line
+    """
+    columns = line.split('\t')
+    flag = int(columns[1])
+    name = columns[0].rsplit(Read.COUNT_SEPARATOR, 1)
+    return name[0], int(name[1]), SplitPart(int(columns[3]) - 1,
+                                            columns[9],
+                                            Read.parseCigar(columns[5]),
+                                            int(columns[4]),
+                                            bool(flag & 0x10),
+                                            bool(flag & 0x4),
+                                            True)
+
   def getFastq(self):
     """
     Return read in FASTQ format
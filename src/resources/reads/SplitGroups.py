@@ -0,0 +1,146 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import numpy
+
+from SplitPart import SplitPart
+from src.tools.LocalAligner import LocalAligner
+from src.variations.factories.CigarFactory import CigarFactory
+
+class SplitGroups:
+  """
+  Groups soft-clipped sequences of split reads by side of clip and breakpoint
+    Only consensus of group is remapped, its alignment is trimmed for each member
+  """
+  bases = numpy.frombuffer('ACGTN', numpy.uint8)
+  queryOperations = (CigarFactory.op.ALIGNMENT, CigarFactory.op.INSERTION, CigarFactory.op.SOFTCLIP, CigarFactory.op.MATCH, CigarFactory.op.MISMATCH)
+  referenceOperations = (CigarFactory.op.ALIGNMENT, CigarFactory.op.DELETION, CigarFactory.op.SKIPPED, CigarFactory.op.MATCH, CigarFactory.op.MISMATCH)
+  mappedOperations = (CigarFactory.op.ALIGNMENT, CigarFactory.op.INSERTION, CigarFactory.op.DELETION, CigarFactory.op.MATCH, CigarFactory.op.MISMATCH)
+
+  def __init__(self):
+    """
+    Initialize variables
+    """
+    self.__groups = {} # (tid, left, breakpoint): [(read, split)]
+    self.__count = 0
+
+  def add(self, read, split):
+    """
+    Add split (index, sequence, quality) of read
+    """
+    left = not any(operator in SplitGroups.mappedOperations for operator, length in read.sam.cigar[:split[0]]) # clipped before mapped part
+    key = (read.tid, left, read.pos if left else read.end)
+    self.__groups.setdefault(key, []).append((read, split))
+    self.__count += 1
+
+  def pop(self, keep=None, before=None):
+    """
+    Remove and return groups as (left, members) except groups of reference keep
+      Groups of reference keep with breakpoint before position are also removed
+    """
+    groups = []
+
+    for key in self.__groups.keys():
+      if key[0] != keep or (before is not None and key[2] < before):
+        groups.append((key[1], self.__groups.pop(key)))
+
+    return groups
+
+  def getCount(self):
+    """
+    Return count of all added splits
+    """
+    return self.__count
+
+  @staticmethod
+  def consensus(left, members):
+    """
+    Return (sequence, quality, inliers, outliers) of group, outliers have too many differences from consensus
+      Sequences are aligned by breakpoint, so left clips are aligned by their ends
+    """
+    length = max(len(split[1]) for read, split in members)
+    matrix = numpy.zeros((len(members), length), numpy.uint8)
+
+    for i, (read, split) in enumerate(members):
+      sequence = numpy.frombuffer(split[1].upper(), numpy.uint8)
+
+      if left:
+        matrix[i, length-len(sequence):] = sequence
+      else:
+        matrix[i, :len(sequence)] = sequence
+
+    counts = numpy.array([(matrix == base).sum(axis=0) for base in SplitGroups.bases])
+    sequence = SplitGroups.bases[counts.argmax(axis=0)]
+    differences = ((matrix != sequence) & (matrix != 0)).sum(axis=1)
+    inliers = []
+    outliers = []
+    quality = None
+
+    for (read, split), difference in zip(members, differences):
+      if LocalAligner.maxDiff(len(split[1])) < difference:
+        outliers.append((read, split))
+      else:
+        inliers.append((read, split))
+
+        if len(split[1]) == length: # quality of the longest member
+          quality = split[2]
+
+    if quality is None: # longest members are outliers
+      quality = max((split[2] for read, split in members), key=len)
+      quality = quality.rjust(length, quality[0]) if left else quality.ljust(length, quality[-1])
+
+    return sequence.tostring(), quality, inliers, outliers
+
+  @staticmethod
+  def __trimCigar(cigar, start, end):
+    """
+    Return offset in reference and CIGAR of query interval [start, end)
+    """
+    queryPos = 0
+    refPos = 0
+    offset = None
+    trimmed = []
+
+    for operator, length in cigar:
+      if operator in SplitGroups.queryOperations:
+        first = max(queryPos, start)
+        last = min(queryPos + length, end)
+
+        if first < last: # operation overlaps interval
+          if offset is None:
+            offset = refPos + (first - queryPos if operator in SplitGroups.referenceOperations else 0)
+
+          trimmed.append([operator, last - first])
+
+        queryPos += length
+      elif start < queryPos < end: # deletion inside interval
+        trimmed.append([operator, length])
+
+      if operator in SplitGroups.referenceOperations:
+        refPos += length
+
+    return offset or 0, [tuple(operation) for operation in trimmed]
+
+  @staticmethod
+  def fanOut(part, left, length, split):
+    """
+    Return part of member split trimmed from remapped part of consensus with length
+      Member keeps its own sequence, only position and CIGAR are taken from consensus
+    """
+    size = len(split[1])
+    (start, end) = (length - size, length) if left else (0, size)
+
+    if part.isUnmapped():
+      return SplitPart(part.pos, split[1], [], part.mapq, False, True, True)
+
+    sequence = split[1]
+
+    if part.isReverse(): # consensus is reverse complement
+      (start, end) = (length - end, length - start)
+      sequence = LocalAligner.reverseComplement(sequence)
+
+    (offset, cigar) = SplitGroups.__trimCigar(part.cigar, start, end)
+    return SplitPart(part.pos + offset, sequence, cigar, part.mapq, part.isReverse(), False, True)
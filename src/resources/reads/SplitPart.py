@@ -71,6 +71,19 @@ class SplitPart:
     """
     return self.__cigar
 
+  @property
+  def mapq(self):
+    """
+    Return mapping quality
+    """
+    return self.__mapq
+
+  def isReverse(self):
+    """
+    Test if part is mapped on reverse strand
+    """
+    return self.__reverse
+
   def isInverted(self):
     """
     Test if part is inverted
@@ -5,42 +5,81 @@ __author__ = "Tomáš Beluský"
 __date__ = "11.04. 2013"
 
 import os
+import re
+import fcntl
+import hashlib
 import subprocess
 
 class Bwa:
   """
   Represents bwa tool
   """
+  CACHE_SUFFIX = ".bwa" # suffix of directory with cached indexes next to reference genome
+  BLOCK_SIZE = 1048576 # length of block of contig read at once
+  reUnsafe = re.compile(r'[^\w.-]') # characters which can't be in filename
 
-  def index(self, filename):
+  def __init__(self, path):
     """
-    Create index file for reference file
+    Initialize variables, indexes of contigs are cached in directory path
     """
-    with open(os.devnull, 'wb') as devnull:
-      subprocess.call(["bwa",
-                       "index",
-                       "%s.fasta" % filename],
-                       stdout=devnull,
-                       stderr=devnull)
+    self.__path = path
 
-  def align(self, filename):
+  @staticmethod
+  def __checksum(length, fetch):
     """
-    Align reads to reference genome
+    Return checksum of sequence of contig read in blocks by fetch(start, end)
+    """
+    checksum = hashlib.md5()
+
+    for start in xrange(0, length, Bwa.BLOCK_SIZE):
+      checksum.update(fetch(start, min(length, start + Bwa.BLOCK_SIZE)))
+
+    return checksum.hexdigest()
+
+  def cachedIndex(self, contig, length, fetch):
+    """
+    Return reference file of contig with index from cache, index is created if it doesn't exist
+      Index is found by checksum of sequence, which is read in blocks by fetch(start, end)
+      Creating is locked, so concurrent processes wait for index of the same contig
+    """
+    filename = os.path.join(self.__path, "%s_%s" % (Bwa.reUnsafe.sub('_', contig), Bwa.__checksum(length, fetch)))
+
+    try: # directory of cached indexes
+      os.makedirs(self.__path)
+    except OSError:
+      if not os.path.isdir(self.__path):
+        raise
+
+    with open("%s.lock" % filename, 'w') as lock:
+      fcntl.flock(lock, fcntl.LOCK_EX)
+
+      try:
+        if not os.path.exists("%s.done" % filename): # create index
+          with open("%s.fasta" % filename, 'w') as refFile:
+            refFile.write(">%s\n" % contig)
+
+            for start in xrange(0, length, Bwa.BLOCK_SIZE):
+              refFile.write(fetch(start, min(length, start + Bwa.BLOCK_SIZE)))
+
+          self.index(filename)
+
+          with open("%s.done" % filename, 'w'): # index is complete
+            pass
+      finally:
+        fcntl.flock(lock, fcntl.LOCK_UN)
+
+    return filename
+
+  def index(self, filename):
+    """
+    Create index file for reference file
     """
     with open(os.devnull, 'wb') as devnull:
-      with open("%s.sai" % filename, "w") as sai:
-        subprocess.call(["bwa",
-                         "aln",
-                         "%s.fasta" % filename,
-                         "%s.fastq" % filename],
-                         stdout=sai,
-                         stderr=devnull)
-
-      with open("%s.sam" % filename, "w") as sam:
-        subprocess.call(["bwa",
-                         "samse",
-                         "%s.fasta" % filename,
-                         "%s.sai" % filename,
-                         "%s.fastq" % filename],
-                         stdout=sam,
-                         stderr=devnull)
+      code = subprocess.call(["bwa",
+                              "index",
+                              "%s.fasta" % filename],
+                              stdout=devnull,
+                              stderr=devnull)
+
+    if code:
+      raise Exception("Indexing of '%s.fasta' by bwa failed" % filename)
@@ -0,0 +1,147 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import os
+import Queue
+import fcntl
+import threading
+import subprocess
+
+class BwaStream:
+  """
+  Remapping of reads by bwa through pipes without temporary files
+    Reads are aligned by "bwa aln" and converted by "bwa samse" while they are written
+  """
+  BATCH_READS = 0x40000 # count of reads read at once by bwa aln and bwa samse
+  QUEUE_READS = 2 * BATCH_READS # count of reads waiting for bwa samse, it lags behind writing by at most one batch
+
+  def __init__(self, threads, parse):
+    """
+    Initialize variables, parse returns (query name, index, part) from SAM line of remapped part
+    """
+    self.__threads = threads
+    self.__parse = parse
+    self.__pipelines = {}
+    self.__parts = {}
+
+  @staticmethod
+  def __setCloexec(descriptor):
+    """
+    Don't inherit descriptor into later started processes
+    """
+    flags = fcntl.fcntl(descriptor, fcntl.F_GETFD)
+    fcntl.fcntl(descriptor, fcntl.F_SETFD, flags | fcntl.FD_CLOEXEC)
+
+  def __read(self, samse, parts):
+    """
+    Parse SAM records from output of bwa samse
+    """
+    for line in samse.stdout:
+      if not line.startswith('@'): # not header
+        parts.append(self.__parse(line))
+
+  def __feed(self, queue, samseInput):
+    """
+    Write reads from queue into bwa samse, it reads them only after their alignments are done
+    """
+    with samseInput:
+      for fastq in iter(queue.get, None):
+        samseInput.write(fastq)
+
+  def __start(self, reference):
+    """
+    Start pipeline for aligning reads against reference
+    """
+    (samseRead, samseWrite) = os.pipe()
+    BwaStream.__setCloexec(samseWrite)
+
+    with open(os.devnull, 'wb') as devnull:
+      aln = subprocess.Popen(["bwa",
+                              "aln",
+                              "-t", str(self.__threads),
+                              "%s.fasta" % reference,
+                              "/dev/stdin"],
+                              bufsize=-1,
+                              stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE,
+                              stderr=devnull)
+      BwaStream.__setCloexec(aln.stdin.fileno())
+      BwaStream.__setCloexec(aln.stdout.fileno())
+      samse = subprocess.Popen(["bwa",
+                                "samse",
+                                "%s.fasta" % reference,
+                                "/dev/stdin",
+                                "/dev/fd/%d" % samseRead],
+                                stdin=aln.stdout,
+                                stdout=subprocess.PIPE,
+                                stderr=devnull)
+      BwaStream.__setCloexec(samse.stdout.fileno())
+
+    aln.stdout.close()
+    os.close(samseRead)
+    parts = []
+    queue = Queue.Queue(BwaStream.QUEUE_READS)
+    threads = [threading.Thread(target=self.__read, args=(samse, parts)),
+               threading.Thread(target=self.__feed, args=(queue, os.fdopen(samseWrite, 'w')))]
+
+    for thread in threads:
+      thread.daemon = True
+      thread.start()
+
+    return (aln, samse, queue, threads, parts)
+
+  def __finish(self, contig):
+    """
+    Wait for end of pipeline and save remapped parts
+    """
+    (aln, samse, queue, threads, parts) = self.__pipelines.pop(contig)
+    aln.stdin.close()
+    queue.put(None)
+
+    for thread in threads:
+      thread.join()
+
+    if aln.wait() or samse.wait():
+      raise Exception("Remapping of reads by bwa failed")
+
+    for qname, index, part in parts:
+      self.__parts.setdefault(qname, []).append((index, part))
+
+  def isOpen(self, contig):
+    """
+    Test if pipeline of contig is running
+    """
+    return contig in self.__pipelines
+
+  def open(self, contig, reference):
+    """
+    Start pipeline of contig with reads aligned against reference file
+    """
+    self.__pipelines[contig] = self.__start(reference)
+
+  def write(self, contig, fastq):
+    """
+    Write reads in FASTQ format into pipeline of contig
+    """
+    pipeline = self.__pipelines[contig]
+    pipeline[0].stdin.write(fastq)
+    pipeline[2].put(fastq)
+
+  def close(self, keep=None):
+    """
+    Finish all pipelines except pipeline of keep contig
+    """
+    for contig in self.__pipelines.keys():
+      if contig != keep:
+        self.__finish(contig)
+
+  def popParts(self):
+    """
+    Remove and return remapped parts of finished pipelines as (index, part) in order of reads
+    """
+    parts = self.__parts
+    self.__parts = {}
+    return parts
@@ -0,0 +1,266 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import math
+import string
+import collections
+import numpy
+
+from src.resources.reads.SplitPart import SplitPart
+from src.variations.factories.CigarFactory import CigarFactory
+
+class LocalAligner:
+  """
+  Aligns split parts into window of reference around their read
+    Candidates are found by k-mer index of reference blocks and verified by banded alignment
+  """
+  KMER = 10 # length of seeds
+  BLOCK_SIZE = 65536 # length of indexed reference block
+  CACHE_BLOCKS = 16 # count of indexed blocks held in memory
+  CANDIDATES = 4 # count of best diagonals verified for each strand
+  INSERT_WINDOWS = 3 # size of window on both sides of read in maximal insert sizes
+  complement = string.maketrans('ACGTacgtNn', 'TGCAtgcaNn')
+  codes = numpy.zeros(256, numpy.int64) + 4 # 2-bit codes of bases, 4 is unknown base
+  codes[numpy.frombuffer('ACGTacgt', numpy.uint8)] = [0, 1, 2, 3, 0, 1, 2, 3]
+
+  def __init__(self, fetchFunc, lengths):
+    """
+    Initialize variables
+    """
+    self.__fetch = fetchFunc
+    self.__lengths = lengths
+    self.__blocks = collections.OrderedDict()
+    self.__maxDiffs = {}
+
+  @staticmethod
+  def __kmers(sequence):
+    """
+    Return codes of all k-mers and their positions, k-mers with unknown base are skipped
+    """
+    values = LocalAligner.codes[numpy.frombuffer(sequence, numpy.uint8)]
+    count = len(values) - LocalAligner.KMER + 1
+
+    if count <= 0:
+      return numpy.zeros(0, numpy.int64), numpy.zeros(0, numpy.int64)
+
+    kmers = numpy.zeros(count, numpy.int64)
+    unknown = numpy.concatenate(([0], numpy.cumsum(values == 4)))
+
+    for i in range(LocalAligner.KMER):
+      kmers = (kmers << 2) | (values[i:i+count] & 3)
+
+    positions = numpy.flatnonzero(unknown[LocalAligner.KMER:] == unknown[:count])
+    return kmers[positions], positions
+
+  @staticmethod
+  def reverseComplement(sequence):
+    """
+    Return reverse complement of sequence
+    """
+    return sequence.translate(LocalAligner.complement)[::-1]
+
+  @staticmethod
+  def maxDiff(length, error=0.02, threshold=0.04):
+    """
+    Return maximal count of differences allowed in alignment of length as in "bwa aln"
+    """
+    elambda = math.exp(-length * error)
+    probability = elambda
+    y = 1.0
+    x = 1
+
+    for k in range(1, 1000):
+      y *= length * error
+      x *= k
+      probability += elambda * y / x
+
+      if 1.0 - probability < threshold:
+        return k
+
+    return 2
+
+  @staticmethod
+  def mappingQuality(best, suboptimal, diff, maxDiff):
+    """
+    Return approximate mapping quality as in "bwa aln"
+    """
+    if best > 1:
+      return 0
+
+    if diff == maxDiff:
+      return 25
+
+    if not suboptimal:
+      return 37
+
+    return max(0, int(23 - 4.343 * math.log(min(suboptimal, 255)) + .499))
+
+  def __block(self, rindex, number):
+    """
+    Return sequence and k-mer index of reference block
+    """
+    key = (rindex, number)
+
+    if key in self.__blocks: # move block to the end
+      block = self.__blocks.pop(key)
+    else:
+      start = number * LocalAligner.BLOCK_SIZE
+      sequence = self.__fetch(rindex, start, start + LocalAligner.BLOCK_SIZE + LocalAligner.KMER - 1)
+      (kmers, positions) = LocalAligner.__kmers(sequence)
+      order = numpy.argsort(kmers, kind='mergesort')
+      block = (sequence[:LocalAligner.BLOCK_SIZE], kmers[order], positions[order] + start)
+
+      if len(self.__blocks) == LocalAligner.CACHE_BLOCKS:
+        self.__blocks.popitem(last=False)
+
+    self.__blocks[key] = block
+    return block
+
+  def __diagonals(self, blocks, start, end, sequence):
+    """
+    Return diagonals of reference window with most seeds of sequence
+    """
+    (kmers, offsets) = LocalAligner.__kmers(sequence)
+    diagonals = []
+
+    for block in blocks:
+      left = numpy.searchsorted(block[1], kmers, 'left')
+      right = numpy.searchsorted(block[1], kmers, 'right')
+
+      for i in numpy.flatnonzero(left < right):
+        diagonals.append(block[2][left[i]:right[i]] - offsets[i])
+
+    if not diagonals:
+      return []
+
+    diagonals = numpy.concatenate(diagonals)
+    diagonals = diagonals[(start <= diagonals) & (diagonals < end)]
+    (values, counts) = numpy.unique(diagonals, return_counts=True)
+    return values[numpy.argsort(-counts, kind='mergesort')[:LocalAligner.CANDIDATES]]
+
+  @staticmethod
+  def __align(query, reference, band):
+    """
+    Align whole query into reference with maximal band differences, return (edits, start, cigar)
+      Rows are prefixes of query, column k of row i is prefix of reference with length i+k
+    """
+    width = 2 * band + 1
+    infinity = len(query) + width
+    rows = [[0] * width]
+
+    for i in range(1, len(query) + 1):
+      previous = rows[-1]
+      row = [infinity] * width
+
+      for k in range(width):
+        j = i + k
+
+        if j > len(reference):
+          break
+
+        value = previous[k] + (query[i-1] != reference[j-1])
+
+        if k + 1 < width and previous[k+1] + 1 < value: # insertion
+          value = previous[k+1] + 1
+
+        if k and row[k-1] + 1 < value: # deletion
+          value = row[k-1] + 1
+
+        row[k] = value
+
+      rows.append(row)
+
+    edits = min(rows[-1])
+    k = rows[-1].index(edits)
+    i = len(query)
+    operations = []
+
+    if edits > band: # too many differences
+      return edits, None, None
+
+    while i: # trace back alignment
+      j = i + k
+
+      if rows[i][k] == rows[i-1][k] + (query[i-1] != reference[j-1]):
+        operation = CigarFactory.op.ALIGNMENT
+        i -= 1
+      elif k + 1 < width and rows[i][k] == rows[i-1][k+1] + 1:
+        operation = CigarFactory.op.INSERTION
+        i -= 1
+        k += 1
+      else:
+        operation = CigarFactory.op.DELETION
+        k -= 1
+
+      if operations and operations[-1][0] == operation:
+        operations[-1][1] += 1
+      else:
+        operations.append([operation, 1])
+
+    return edits, k, [tuple(operation) for operation in reversed(operations)]
+
+  @staticmethod
+  def __slice(blocks, blockStart, first, last):
+    """
+    Return sequence of reference interval [first, last) sliced from consecutive blocks starting at blockStart
+    """
+    number = (first - blockStart) // LocalAligner.BLOCK_SIZE
+    offset = first - blockStart - number * LocalAligner.BLOCK_SIZE
+    sequence = blocks[number][0][offset:offset + last - first]
+
+    while len(sequence) < last - first and number + 1 < len(blocks): # interval continues in next block
+      number += 1
+      sequence += blocks[number][0][:last - first - len(sequence)]
+
+    return sequence
+
+  def align(self, rindex, pos, end, sequence, maxInsert):
+    """
+    Return part aligned near read at [pos, end) or None if there isn't any good hit
+      Mapping quality is approximated as in "bwa aln" only from hits in window, copies of sequence out of window don't lower it
+      So part repeated elsewhere in genome can pass minimal mapping quality of split parts, although bwa would give it 0
+    """
+    if len(sequence) < LocalAligner.KMER:
+      return None
+
+    if len(sequence) not in self.__maxDiffs:
+      self.__maxDiffs[len(sequence)] = LocalAligner.maxDiff(len(sequence))
+
+    maxDiff = self.__maxDiffs[len(sequence)]
+    window = LocalAligner.INSERT_WINDOWS * max(maxInsert, end - pos)
+    start = max(0, pos - window)
+    end = min(self.__lengths[rindex], end + window)
+    blocks = [self.__block(rindex, number) for number in range(start // LocalAligner.BLOCK_SIZE, (end - 1) // LocalAligner.BLOCK_SIZE + 1)]
+    blockStart = start // LocalAligner.BLOCK_SIZE * LocalAligner.BLOCK_SIZE
+    hits = {}
+
+    for reverse in (False, True):
+      query = LocalAligner.reverseComplement(sequence) if reverse else sequence
+      upper = query.upper()
+
+      for diagonal in self.__diagonals(blocks, start, end, query):
+        first = max(blockStart, int(diagonal) - maxDiff)
+        last = min(end, int(diagonal) + len(query) + maxDiff)
+        (edits, offset, cigar) = LocalAligner.__align(upper, LocalAligner.__slice(blocks, blockStart, first, last).upper(), maxDiff)
+
+        if edits <= maxDiff:
+          hits[(reverse, first + offset)] = (edits, query, cigar)
+
+    if not hits:
+      return None
+
+    best = min(hit[0] for hit in hits.values())
+    bestHits = [key for key, hit in hits.items() if hit[0] == best]
+    suboptimal = len([hit for hit in hits.values() if hit[0] == best + 1])
+    (reverse, position) = min(bestHits)
+    (edits, query, cigar) = hits[(reverse, position)]
+    return SplitPart(position,
+                     query,
+                     cigar,
+                     LocalAligner.mappingQuality(len(bestHits), suboptimal, edits, maxDiff),
+                     reverse,
+                     False,
+                     True)
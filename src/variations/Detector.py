@@ -4,11 +4,15 @@
 __author__ = "Tomáš Beluský"
 __date__ = "05.03. 2013"
 
-import copy
+import sys
+import heapq
+import bisect
 from datetime import date
 from bx.intervals.intersection import Intersecter, Interval
 
+from SmallVariations import SmallVariations
 from Variation import Variation
+from clusters.OppositeCluster import OppositeCluster
 from clusters.SnpCluster import SnpCluster
 from clusters.StructuralCluster import StructuralCluster
 from factories.PairFactory import PairFactory
@@ -22,6 +26,7 @@ class Detector:
   """
   Detector of variations
   """
+  FLUSH_STEP = 100000 # distance of cursor between writings of passed clusters in streaming mode
 
   def __init__(self, sample, refgenome, output):
     """
@@ -31,7 +36,17 @@ class Detector:
     self.__cigarFactory = CigarFactory(self.__sample)
     self.__pairFactory = PairFactory(self.__sample)
     self.__splitFactory = SplitFactory(self.__sample)
+    self.__late = 0
 
+    self.__vcfCreator = None
+
+    if output is not None: # variations are written
+      self.__createVcf(refgenome, output)
+
+  def __createVcf(self, refgenome, output):
+    """
+    Create VCF output and write its header
+    """
     self.__vcfCreator = VcfCreator(refgenome.filename, output)
     self.__vcfCreator.addHeader('fileDate', date.today().strftime('%Y%m%d'))
     self.__vcfCreator.addHeader('source', 'gataca')
@@ -65,18 +80,22 @@ class Detector:
     Clear variables
     """
     self.__variations = dict((x, []) for x in self.__sample.getReferences())
+    self.__settled = dict((x, []) for x in self.__sample.getReferences()) # variations which don't help opposite clusters
+    self.__refIndexes = dict((x, i) for i, x in enumerate(self.__sample.getReferences()))
+    self.__written = None # position before which all clusters were written in streaming mode
+    self.__finished = [] # heap of written clusters waiting for clusters before them
+    self.__smallVariations = SmallVariations(self.__sample) # SNPs and indels from CIGAR and MD tag
+    self.__collected = None # variations and variations of opposite clusters of chunk in order of pairs
 
-    self.__clusters = dict((x, {}) for x in self.__sample.getReferences())
     self.__finalClusters = dict((x, []) for x in self.__sample.getReferences())
-    self.__clusterTree = dict((x, Intersecter()) for x in self.__sample.getReferences())
 
-    self.__opposites = copy.deepcopy(self.__clusters)
+    self.__opposites = dict((x, {}) for x in self.__sample.getReferences())
     self.__finalOpposites = []
-    self.__oppositeTree = copy.deepcopy(self.__clusterTree)
+    self.__oppositeTree = dict((x, Intersecter()) for x in self.__sample.getReferences())
 
   def __changeInterval(self, item, oldStart, oldEnd, newStart, newEnd, intervals, tree):
     """
-    Change interval where item belongs
+    Change interval where item belongs, return True if interval was added into tree
     """
     if newStart != oldStart or newEnd != oldEnd:
       intervals[(oldStart, oldEnd)].remove(item)
@@ -84,8 +103,11 @@ class Detector:
       if not intervals.get((newStart, newEnd), None):
         intervals[(newStart, newEnd)] = [item]
         tree.add_interval(Interval(newStart, newEnd))
-      else:
-        intervals[(newStart, newEnd)].append(item)
+        return True
+
+      intervals[(newStart, newEnd)].append(item)
+
+    return False
 
   def __removeInterval(self, intervals, start, end):
     """
@@ -94,6 +116,47 @@ class Detector:
     if not len(intervals.get((start, end), [None])):
       del intervals[(start, end)]
 
+  def __removeItem(self, item, start, end, intervals):
+    """
+    Remove item from its interval
+    """
+    intervals[(start, end)].remove(item)
+    self.__removeInterval(intervals, start, end)
+
+  def __rebuildTree(self, intervals):
+    """
+    Return new tree of intervals, trees keep removed intervals
+    """
+    tree = Intersecter()
+
+    for start, end in intervals:
+      tree.add_interval(Interval(start, end))
+
+    return tree
+
+  def __passed(self, ref, position, limit):
+    """
+    Test if position of reference is before limit (tid, position), every position is before limit None
+    """
+    return limit is None or (self.__refIndexes[ref], position) < limit
+
+  def __isLate(self, variation):
+    """
+    Test if variation comes after clusters of its position were written
+    """
+    return self.__written is not None and self.__passed(variation.getReference(), variation.getStart(), self.__written)
+
+  def __addVariation(self, variation):
+    """
+    Add variation or drop it if it's late, variation of chunk is only collected
+    """
+    if self.__collected is not None:
+      self.__collected.append(variation)
+    elif self.__isLate(variation):
+      self.__late += 1
+    else:
+      self.__variations[variation.getReference()].append(variation)
+
   def __addVariationIntoOpposite(self, var, fromCluster):
     """
     Add variation into oppostine cluster
@@ -119,8 +182,12 @@ class Detector:
 
   def __addOppositeCluster(self, cluster):
     """
-    Add oposite cluster into list or extend existing one
+    Add oposite cluster into list or extend existing one, variations of cluster of chunk are only collected
     """
+    if self.__collected is not None:
+      self.__collected.append(tuple(cluster.getVariations()))
+      return
+
     append = True
 
     for var in cluster.getVariations(): # try to add variation into opposite
@@ -135,163 +202,522 @@ class Detector:
         self.__opposites[ref][interval] = self.__opposites[ref].get(interval, []) + [(cluster, index)]
         self.__oppositeTree[ref].add_interval(Interval(interval[0], interval[1]))
 
-  def __processOppositeClusters(self):
+  def __helpOpposites(self, ref, variations):
+    """
+    Let variations sorted by start help opposite clusters of reference to decide and return variations which didn't help
+      Intervals of tree are swept in order of their starts and forgotten after their ends, overlapped intervals are visited
+      in order of tree queries: by start, empty intervals from the last added, other intervals from the first added
+    """
+    intervals = self.__opposites[ref]
+    tree = self.__oppositeTree[ref]
+    following = [] # heap of intervals of tree by order of tree queries
+    tree.traverse(lambda node: following.append((node.start, node.start < node.end, len(following), node.end)))
+    added = len(following)
+    active = {}
+    ends = [] # heap of ends of active intervals
+    unused = []
+
+    for variation in variations:
+      (start, end) = (variation.getMaxStart() - 1, variation.getMaxEnd() + 1)
+      helped = False
+
+      while following and following[0][0] < end: # intervals starting before end of variation
+        interval = heapq.heappop(following)
+        active[interval[2]] = interval
+        heapq.heappush(ends, (interval[3], interval[2]))
+
+      while ends and ends[0][0] <= start: # intervals ending before variation can't overlap next variations
+        del active[heapq.heappop(ends)[1]]
+
+      for (intervalStart, notEmpty, order, intervalEnd) in sorted(i for i in active.itervalues() if i[0] < end and start < i[3]):
+        items = intervals.get((intervalStart, intervalEnd), [])
+
+        for i in reversed(range(len(items))): # go through all cluster's variations
+          newVariation = items[i][0].helpDecide(items[i][1], variation, False)
+
+          if newVariation: # joined
+            helped = True
+            (newStart, newEnd) = (newVariation.getMaxStart(), newVariation.getMaxEnd())
+
+            if self.__changeInterval(items[i], intervalStart, intervalEnd, newStart, newEnd, intervals, tree):
+              heapq.heappush(following, (newStart, newStart < newEnd, added if newStart < newEnd else -added, newEnd))
+              added += 1
+
+        self.__removeInterval(intervals, intervalStart, intervalEnd)
+
+      if not helped:
+        unused.append(variation)
+
+    return unused
+
+  def __processOppositeClusters(self, limit=None):
     """
-    Find winning variations and append them with unused variations into all variations
+    Find winning variations and append them with unused variations into settled variations
+      Only variations and opposite clusters before limit are processed, counted indels before limit are added first
     """
+    for variation in self.__smallVariations.popIndels(limit):
+      self.__addVariation(variation)
+
     for ref in self.__variations: # help clusters to decide about winning variations
-      for i in range(len(self.__variations[ref])):
-        variation = self.__variations[ref].pop(0)
+      waiting = []
+      passed = []
+
+      for variation in self.__variations[ref]:
+        if self.__passed(ref, variation.getMaxStart(), limit):
+          passed.append(variation)
+        else: # opposite clusters can come yet
+          waiting.append(variation)
 
-        if not self.__addVariationIntoOpposite(variation, False):
-          self.__variations[ref].append(variation)
+      self.__variations[ref] = waiting
+
+      if self.__opposites[ref]:
+        passed = self.__helpOpposites(ref, sorted(passed, key=lambda v: v.getMaxStart()))
+
+      self.__settled[ref].extend(passed)
 
     unused = set()
     helpers = set()
+    opposites = []
+    changed = set()
 
     while len(self.__finalOpposites):
       cluster = self.__finalOpposites.pop()
+
+      if not all(self.__passed(var.getReference(), var.getMaxEnd(), limit) for var in cluster.getVariations()):
+        opposites.append(cluster)
+        continue
+
       cluster.process()
       winner = cluster.getWinner()
 
       if winner: # append winner
-        self.__variations[winner.getReference()].append(winner)
+        self.__settled[winner.getReference()].append(winner)
         helpers |= cluster.getHelpers()
 
       unused |= cluster.getUnused()
 
+      if limit is not None: # remove processed cluster
+        for index, var in enumerate(cluster.getVariations()):
+          self.__removeItem((cluster, index), var.getMaxStart(), var.getMaxEnd(), self.__opposites[var.getReference()])
+          changed.add(var.getReference())
+
+    self.__finalOpposites = opposites[::-1]
+
+    for ref in changed:
+      self.__oppositeTree[ref] = self.__rebuildTree(self.__opposites[ref])
+
     for var in unused.difference(helpers):
-      self.__variations[var.getReference()].append(var)
+      self.__settled[var.getReference()].append(var)
 
   def __makeClusters(self):
     """
-    Make clusters from finded variations to join alleles together
+    Make clusters from settled variations to join alleles together
+      Variations are swept in order of their starts, clusters ending before all next variations are forgotten
     """
-    for ref in sorted(self.__variations, key=lambda r: self.__sample.getRefIndex(r)): # all references
-      for variation in sorted(self.__variations[ref], key=lambda v: v.getStart()): # all variations
-        ref = variation.getReference()
+    for ref in sorted(self.__settled, key=lambda r: self.__refIndexes[r]): # all references
+      variations = []
+
+      for variation in self.__settled[ref]:
+        if self.__isLate(variation):
+          self.__late += 1
+        else:
+          variations.append(variation)
+
+      self.__settled[ref] = []
+      variations.sort(key=lambda v: v.getStart())
+      bounds = [] # the smallest max start of following variations
+      bound = None
+
+      for variation in reversed(variations):
+        bound = variation.getMaxStart() if bound is None else min(bound, variation.getMaxStart())
+        bounds.append(bound)
+
+      active = dict((id(cluster), cluster) for cluster in self.__finalClusters[ref])
+      ends = [(cluster.getEnd(), key) for key, cluster in active.items()] # heap of ends, clusters which grew have more items
+      heapq.heapify(ends)
+
+      for variation, bound in zip(variations, reversed(bounds)): # all variations
         start = variation.getMaxStart()
         end = variation.getMaxEnd()
         added = False
 
-        for interval in self.__clusterTree[ref].find(start-1, end+1): # compare similarity with overlapped clusters
-          clusters = self.__clusters[ref].get((interval.start, interval.end), [])
+        while ends and ends[0][0] < bound: # cluster can't overlap any following variation
+          (clusterEnd, key) = heapq.heappop(ends)
 
-          for i in reversed(range(len(clusters))):
-            if clusters[i].add(variation): # can add into cluster
-              added = True
-              self.__changeInterval(clusters[i], interval.start, interval.end,
-                                    clusters[i].getStart(), clusters[i].getEnd(),
-                                    self.__clusters[ref], self.__clusterTree[ref])
+          if key in active and active[key].getEnd() == clusterEnd:
+            del active[key]
 
-          self.__removeInterval(self.__clusters[ref], interval.start, interval.end)
+        for cluster in active.values(): # compare similarity with overlapped clusters
+          if cluster.getStart() <= end and start <= cluster.getEnd() and cluster.add(variation): # can add into cluster
+            added = True
+            heapq.heappush(ends, (cluster.getEnd(), id(cluster)))
 
         if not added: # create new cluster
-          if variation.getType() == Variation.vtype.SNP:
-            cluster = SnpCluster(ref, self.__sample, variation)
-          else:
-            cluster = StructuralCluster(ref, self.__sample, variation)
-
+          cluster = StructuralCluster(ref, self.__sample, variation)
           self.__finalClusters[ref].append(cluster)
-          self.__clusters[ref][(start, end)] = self.__clusters[ref].get((start, end), []) + [cluster]
-          self.__clusterTree[ref].add_interval(Interval(start, end))
+          active[id(cluster)] = cluster
+          heapq.heappush(ends, (cluster.getEnd(), id(cluster)))
 
-  def __write(self):
+  def __getClusters(self, limit=None):
     """
-    Write clusters with founded variations in VCF format
+    Return clusters of region in order of their positions
+      Only clusters ending before limit are returned and removed
     """
+    clusters = []
+    snpClusters = dict((x, []) for x in self.__sample.getReferences())
+
+    for cluster in self.__smallVariations.popClusters(limit):
+      snpClusters[cluster.getReference()].append(cluster)
+
     for ref in self.__sample.getReferences(): # add all clusters
-      for cluster in sorted(self.__finalClusters[ref], key=lambda c: c.getActualStart()):
+      active = []
+
+      for cluster in sorted(snpClusters[ref] + self.__finalClusters[ref], key=lambda c: c.getActualStart()):
+        if not self.__passed(ref, cluster.getEnd(), limit): # variations can be added yet
+          active.append(cluster)
+          continue
+
         if not self.__sample.clusterOutOfRegion(Settings.REFERENCE, Settings.START, Settings.END, cluster):
-          self.__vcfCreator.writeRecord(cluster.toString())
+          clusters.append(cluster)
+
+      self.__finalClusters[ref] = active
+
+    return clusters
+
+  def __flushClusters(self, frontier):
+    """
+    Return clusters which can't be changed by pairs after frontier (tid, position) in order of positions
+      Variations are settled one maximal insert size behind frontier, clusters are written two maximal insert sizes behind it
+      All clusters are returned without frontier
+    """
+    if frontier is None:
+      (settle, finish) = (None, None)
+    else:
+      margin = self.__sample.getMaxInsertSize()
+      settle = (frontier[0], frontier[1] - margin)
+      finish = (frontier[0], frontier[1] - 2 * margin)
+
+    self.__processOppositeClusters(settle)
+    self.__makeClusters()
+
+    for cluster in self.__getClusters(finish):
+      heapq.heappush(self.__finished, (self.__refIndexes[cluster.getReference()], cluster.getActualStart(), id(cluster), cluster))
+
+    if finish is not None:
+      self.__written = max(self.__written, finish)
+      bound = min([finish] + [(self.__refIndexes[ref], cluster.getActualStart()) for ref in self.__finalClusters for cluster in self.__finalClusters[ref]])
+
+    while self.__finished and (frontier is None or self.__finished[0][:2] < bound): # nothing can come before cluster
+      yield heapq.heappop(self.__finished)[-1]
+
+  def writeRecords(self, records):
+    """
+    Write records of clusters in VCF format
+    """
+    for record in records:
+      self.__vcfCreator.writeRecord(record)
+
+  def getRecords(self, clusters):
+    """
+    Return records of clusters in VCF format with keys (reference index, position, structural) which sort them like one pass
+    """
+    for cluster in clusters:
+      yield (self.__refIndexes[cluster.getReference()], cluster.getActualStart(), not isinstance(cluster, SnpCluster)), cluster.toString()
 
   def __getSnpIndels(self, read):
     """
-    Get SNPs and indels from CIGAR string and MD tag
+    Count SNPs and indels from CIGAR string and MD tag of SAM read object
     """
-    for variation in self.__cigarFactory.snpIndels(read):
-      self.__variations[variation.getReference()].append(variation)
+    self.__cigarFactory.snpIndels(read, self.__smallVariations)
 
   def start(self):
     """
-    Start finding variations
+    Start finding variations and write them
+    """
+    clusters = self.streamClusters() if Settings.STREAMING else self.findClusters()
+    self.writeRecords(cluster.toString() for cluster in clusters)
+    self.close()
+    return 0
+
+  def getStatistics(self):
+    """
+    Return statistics useful for tuning of settings
+    """
+    return [("Late variations dropped", self.__late + self.__smallVariations.getLate())]
+
+  def close(self):
+    """
+    Close output
+    """
+    self.__vcfCreator.close()
+
+  def findClusters(self):
+    """
+    Find clusters of variations in region
     """
-    self.__sample.preprocessing()
     self.__clearVariables()
 
-    # fetch paired reads (can be also singleton or unmapped mate)
-    for paired in self.__sample.fetchPairs(reference=Settings.REFERENCE, start=Settings.START, end=Settings.END):
-      if paired.isSingle():
-        self.__getSnpIndels(paired.read)
-      else:
-        self.__getSnpIndels(paired.read)
-        self.__getSnpIndels(paired.mate)
-        variation = None
-
-        if paired.isNormal():
-          if paired.isRearranged():
-            if paired.isInterchromosomal():
-              self.__addOppositeCluster(self.__pairFactory.translocationRearranged(paired))
-            elif paired.hasOverlap():
-              variation = self.__pairFactory.overlapRearranged(paired)
-            else:
-              self.__addOppositeCluster(self.__pairFactory.rearrangement(paired))
-          elif paired.isInterchromosomal():
-            if not paired.read.isInverted() and not paired.mate.isInverted():
-              self.__addOppositeCluster(self.__pairFactory.translocation(paired))
-          elif paired.read.isInverted():
-            variation = self.__pairFactory.inversionRead(paired)
-          elif paired.mate.isInverted():
-            variation = self.__pairFactory.inversionMate(paired)
-          elif paired.hasOverlap():
-            variation = self.__pairFactory.overlap(paired)
-          elif paired.actualSize() < self.__sample.getMinInsertSize():
-            self.__addOppositeCluster(self.__pairFactory.smallInsertSize(paired))
-          elif paired.actualSize() > self.__sample.getMaxInsertSize():
-            self.__addOppositeCluster(self.__pairFactory.bigInsertSize(paired))
-        elif (paired.isReadSplit() or paired.isMateSplit()) and paired.splitpair.splitread.isUsable():
-          if paired.splitpair.splitread.left.isUnmapped():
-            if not paired.splitpair.splitread.right.isInverted():
-              if paired.splitpair.isReadFirst():
-                variation = self.__splitFactory.leftEncloseInsertion(paired.splitpair.read, paired.splitpair.splitread)
-              else:
-                variation = self.__splitFactory.leftInsertion(paired.splitpair.splitread)
-          elif paired.splitpair.splitread.right.isUnmapped():
-            if not paired.splitpair.splitread.left.isInverted():
-              if paired.splitpair.isReadFirst():
-                variation = self.__splitFactory.rightInsertion(paired.splitpair.splitread)
-              else:
-                variation = self.__splitFactory.rightEncloseInsertion(paired.splitpair.read, paired.splitpair.splitread)
-          elif paired.splitpair.splitread.left.isInverted():
-            if not paired.splitpair.partsEnclosePair() and not paired.splitpair.splitread.isRearranged() and not paired.splitpair.splitread.right.isInverted():
-              variation = self.__splitFactory.inversionLeft(paired.splitpair.splitread)
-          elif paired.splitpair.splitread.right.isInverted():
-            if not paired.splitpair.partsEnclosePair() and not paired.splitpair.splitread.isRearranged():
-              variation = self.__splitFactory.inversionRight(paired.splitpair.splitread)
-          elif paired.splitpair.hasOverlap():
-            variation = self.__splitFactory.overlapPair(paired.splitpair, paired.splitpair.splitread)
-          elif paired.splitpair.partsEnclosePair():
-            if paired.splitpair.splitread.isRearranged():
-              self.__addOppositeCluster(self.__splitFactory.encloseRearrangement(paired))
-            else:
-              self.__addOppositeCluster(self.__splitFactory.enclose(paired))
-          elif paired.splitpair.splitread.isRearranged():
-            if paired.splitpair.splitread.hasGap():
-              self.__addOppositeCluster(self.__splitFactory.rearrangement(paired))
-            else:
-              variation = self.__splitFactory.overlapRearrangedParts(paired.splitpair.splitread)
-          elif paired.splitpair.splitread.hasGap():
-            self.__addOppositeCluster(self.__splitFactory.gap(paired))
-          elif paired.splitpair.splitread.hasOverlap():
-            variation = self.__splitFactory.overlapParts(paired.splitpair.splitread)
-          elif paired.splitpair.splitread.hasInsertion():
-            variation = self.__splitFactory.normalInsertion(paired.splitpair.splitread)
+    # fetch paired reads of region while statistics are counted (can be also singleton or unmapped mate)
+    for paired in self.__sample.preprocessing():
+      self.__processPair(paired)
+
+    self.__processOppositeClusters()
+    self.__makeClusters()
+    return self.__getClusters()
+
+  def collectChunk(self, reference, start, end, first):
+    """
+    Find variations of pairs of chunk without clustering them, they are merged with other chunks by mergeChunks
+      Variations of pairs with split read waiting for remapping are returned separately, because these pairs come last
+    """
+    self.__clearVariables()
+    parts = []
+    self.__collected = []
+    remapped = self.__sample.isRemapped()
+
+    for paired in self.__sample.preprocessing((reference, start, end, first)):
+      if not remapped and self.__sample.isRemapped(): # pairs with remapped split reads
+        parts.append((self.__collected, self.__smallVariations.export()))
+        self.__collected = []
+        self.__smallVariations = SmallVariations(self.__sample)
+        remapped = True
+
+      self.__processPair(paired)
+
+    parts.append((self.__collected, self.__smallVariations.export()))
 
-        if variation: # append variation
-          self.__variations[variation.getReference()].append(variation)
+    if len(parts) == 1: # no pairs waited for remapping
+      parts.append(([], SmallVariations(self.__sample).export()))
+
+    self.__collected = None
+    return parts
+
+  def mergeChunks(self, chunks):
+    """
+    Find clusters of variations collected in chunks of region
+      Variations are added in the same order as in one pass, first before remapping in order of chunks, then after it
+    """
+    self.__clearVariables()
+
+    for collected, smallVariations in [parts[0] for parts in chunks] + [parts[1] for parts in chunks]:
+      self.__smallVariations.merge(smallVariations)
+
+      for item in collected:
+        if isinstance(item, tuple): # variations of opposite cluster
+          self.__addOppositeCluster(OppositeCluster(self.__sample, *item))
+        else:
+          self.__addVariation(item)
 
     self.__processOppositeClusters()
     self.__makeClusters()
-    self.__write()
-    self.__vcfCreator.close()
-    return 0
+    return self.__getClusters()
+
+  def __chunkItems(self, parts):
+    """
+    Return items (part, variation index or indel) of collected chunk and maximal intervals (tid, start, end, item) of their variations
+    """
+    refIndexes = dict((x, i) for i, x in enumerate(self.__sample.getReferences()))
+    items = []
+    spans = []
+
+    for index, (collected, (snps, indels)) in enumerate(parts):
+      for position, item in enumerate(collected):
+        for var in item if isinstance(item, tuple) else (item,):
+          spans.append((refIndexes[var.getReference()], var.getMaxStart(), var.getMaxEnd(), len(items)))
+
+        items.append((index, position))
+
+      for key in indels: # indels become variations starting at their positions
+        (tid, position, vtype, length) = key
+        spans.append((tid, position, position + 1 + length if vtype == Variation.vtype.DEL else position, len(items)))
+        items.append((index, key))
+
+    return items, spans
+
+  @staticmethod
+  def __root(roots, item):
+    """
+    Return item representing all items joined with item
+    """
+    while roots[item] != item:
+      roots[item] = roots[roots[item]]
+      item = roots[item]
+
+    return item
+
+  def getSpans(self, parts):
+    """
+    Return maximal intervals (tid, start, end) of variations and positions (tid, position) of SNPs of collected chunk
+    """
+    spans = [span[:3] for span in self.__chunkItems(parts)[1]]
+    return spans, [key for collected, (snps, indels) in parts for key in snps]
+
+  def splitChunk(self, parts, interior=None, intrusions=None):
+    """
+    Split collected chunk into variations which can meet variations of other chunks and variations which can be clustered alone
+      Variations meet if their maximal intervals overlap or they are in one opposite cluster, SNPs and indels meet at their positions
+      Variations out of interior (reference, start, end) or meeting intrusions (intervals, SNP positions) of other chunks are split off
+      with all variations which meet them, so clusters of both returned chunks are the same as clusters of whole chunk
+    """
+    (items, spans) = self.__chunkItems(parts)
+    (intervals, positions) = intrusions or ([], [])
+    inside = None if interior is None else (self.__sample.getRefIndex(interior[0]), interior[1], interior[2])
+    roots = range(len(items))
+    seeds = set()
+    intruded = {} # tid: sorted merged intervals of intrusions
+
+    for tid, start, end in sorted(intervals):
+      if intruded.get(tid) and start <= intruded[tid][-1][1]:
+        intruded[tid][-1][1] = max(intruded[tid][-1][1], end)
+      else:
+        intruded.setdefault(tid, []).append([start, end])
+
+    for tid in intruded:
+      intruded[tid] = ([start for start, end in intruded[tid]], [end for start, end in intruded[tid]])
+
+    last = None # (tid, end, item) of overlapping intervals swept last
+
+    for tid, start, end, item in sorted(spans):
+      if inside is not None and not (tid == inside[0] and inside[1] <= start and end < inside[2]): # can meet neighbouring chunk
+        seeds.add(item)
+
+      if tid in intruded:
+        (starts, ends) = intruded[tid]
+        index = bisect.bisect_right(starts, end) - 1
+
+        if 0 <= index and start <= ends[index]: # meets intrusion
+          seeds.add(item)
+
+      if last is not None and last[0] == tid and start <= last[1]: # overlaps previous intervals
+        roots[Detector.__root(roots, item)] = Detector.__root(roots, last[2])
+        last = (tid, max(last[1], end), last[2])
+      else:
+        last = (tid, end, item)
+
+    met = set(Detector.__root(roots, item) for item in seeds)
+    positions = set(positions)
+    split = ([], []) # parts which meet other chunks and parts which don't
+    item = 0
+
+    for collected, (snps, indels) in parts:
+      chunks = tuple(([], ({}, {})) for part in split)
+
+      for variation in collected:
+        chunks[Detector.__root(roots, item) not in met][0].append(variation)
+        item += 1
+
+      for key in indels:
+        chunks[Detector.__root(roots, item) not in met][1][1][key] = indels[key]
+        item += 1
+
+      for key in snps:
+        outside = inside is not None and not (key[0] == inside[0] and inside[1] <= key[1] < inside[2])
+        chunks[not (outside or key in positions)][1][0][key] = snps[key]
+
+      for part, chunk in zip(split, chunks):
+        part.append(chunk)
+
+    return split
+
+  def streamClusters(self):
+    """
+    Find clusters of variations in region and return them as soon as next pairs can't change them
+      Only variations near cursor are held, variations coming after clusters of their position were written are dropped
+      Without saved statistics clusters are held until sample estimates coverage from passed reads
+    """
+    self.__clearVariables()
+    flushed = None
+
+    for paired in self.__sample.preprocessing():
+      self.__processPair(paired)
+      frontier = self.__sample.getFrontier()
+
+      if frontier is not None and (flushed is None or frontier[0] != flushed[0] or Detector.FLUSH_STEP <= frontier[1] - flushed[1]):
+        flushed = frontier
+
+        for cluster in self.__flushClusters(frontier):
+          yield cluster
+
+    for cluster in self.__flushClusters(None):
+      yield cluster
+
+    late = self.__late + self.__smallVariations.getLate()
+
+    if late: # variations can't be added into written clusters
+      sys.stderr.write("Warning: %d variations came after clusters of their positions were written and were dropped, run without streaming to keep them\n" % late)
+
+  def __processPair(self, paired):
+    """
+    Find variations of paired reads
+    """
+    if paired.isPlain(): # reads without other evidence
+      self.__getSnpIndels(paired.read)
+      self.__getSnpIndels(paired.mate)
+    elif paired.isSingle():
+      self.__getSnpIndels(paired.read.sam)
+    else:
+      self.__getSnpIndels(paired.read.sam)
+      self.__getSnpIndels(paired.mate.sam)
+      variation = None
+
+      if paired.isNormal():
+        if paired.isRearranged():
+          if paired.isInterchromosomal():
+            self.__addOppositeCluster(self.__pairFactory.translocationRearranged(paired))
+          elif paired.hasOverlap():
+            variation = self.__pairFactory.overlapRearranged(paired)
+          else:
+            self.__addOppositeCluster(self.__pairFactory.rearrangement(paired))
+        elif paired.isInterchromosomal():
+          if not paired.read.isInverted() and not paired.mate.isInverted():
+            self.__addOppositeCluster(self.__pairFactory.translocation(paired))
+        elif paired.read.isInverted():
+          variation = self.__pairFactory.inversionRead(paired)
+        elif paired.mate.isInverted():
+          variation = self.__pairFactory.inversionMate(paired)
+        elif paired.hasOverlap():
+          variation = self.__pairFactory.overlap(paired)
+        elif paired.actualSize() < self.__sample.getMinInsertSize():
+          self.__addOppositeCluster(self.__pairFactory.smallInsertSize(paired))
+        elif paired.actualSize() > self.__sample.getMaxInsertSize():
+          self.__addOppositeCluster(self.__pairFactory.bigInsertSize(paired))
+      elif (paired.isReadSplit() or paired.isMateSplit()) and paired.splitpair.splitread.isUsable():
+        if paired.splitpair.splitread.left.isUnmapped():
+          if not paired.splitpair.splitread.right.isInverted():
+            if paired.splitpair.isReadFirst():
+              variation = self.__splitFactory.leftEncloseInsertion(paired.splitpair.read, paired.splitpair.splitread)
+            else:
+              variation = self.__splitFactory.leftInsertion(paired.splitpair.splitread)
+        elif paired.splitpair.splitread.right.isUnmapped():
+          if not paired.splitpair.splitread.left.isInverted():
+            if paired.splitpair.isReadFirst():
+              variation = self.__splitFactory.rightInsertion(paired.splitpair.splitread)
+            else:
+              variation = self.__splitFactory.rightEncloseInsertion(paired.splitpair.read, paired.splitpair.splitread)
+        elif paired.splitpair.splitread.left.isInverted():
+          if not paired.splitpair.partsEnclosePair() and not paired.splitpair.splitread.isRearranged() and not paired.splitpair.splitread.right.isInverted():
+            variation = self.__splitFactory.inversionLeft(paired.splitpair.splitread)
+        elif paired.splitpair.splitread.right.isInverted():
+          if not paired.splitpair.partsEnclosePair() and not paired.splitpair.splitread.isRearranged():
+            variation = self.__splitFactory.inversionRight(paired.splitpair.splitread)
+        elif paired.splitpair.hasOverlap():
+          variation = self.__splitFactory.overlapPair(paired.splitpair, paired.splitpair.splitread)
+        elif paired.splitpair.partsEnclosePair():
+          if paired.splitpair.splitread.isRearranged():
+            self.__addOppositeCluster(self.__splitFactory.encloseRearrangement(paired))
+          else:
+            self.__addOppositeCluster(self.__splitFactory.enclose(paired))
+        elif paired.splitpair.splitread.isRearranged():
+          if paired.splitpair.splitread.hasGap():
+            self.__addOppositeCluster(self.__splitFactory.rearrangement(paired))
+          else:
+            variation = self.__splitFactory.overlapRearrangedParts(paired.splitpair.splitread)
+        elif paired.splitpair.splitread.hasGap():
+          self.__addOppositeCluster(self.__splitFactory.gap(paired))
+        elif paired.splitpair.splitread.hasOverlap():
+          variation = self.__splitFactory.overlapParts(paired.splitpair.splitread)
+        elif paired.splitpair.splitread.hasInsertion():
+          variation = self.__splitFactory.normalInsertion(paired.splitpair.splitread)
+
+      if variation: # append variation
+        self.__addVariation(variation)
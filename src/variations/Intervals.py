@@ -0,0 +1,87 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import bisect
+
+class Intervals(object):
+  """
+  Counted intervals of reads supporting variation
+    Same intervals are merged on insert, distinct intervals are kept sorted by start and end
+  """
+  __slots__ = ('__counts', '__sorted', '__depth')
+
+  def __init__(self, *intervals):
+    """
+    Initialize variables from lists of [start, end] or counted intervals
+    """
+    self.__counts = {} # (start, end): count
+    self.__sorted = []
+    self.__depth = 0
+
+    for other in intervals:
+      self.update(other)
+
+  def add(self, start, end, count=1):
+    """
+    Add interval supported by count of reads
+    """
+    key = (start, end)
+
+    if key in self.__counts:
+      self.__counts[key] += count
+    else:
+      self.__counts[key] = count
+      bisect.insort(self.__sorted, key)
+
+    self.__depth += count
+
+  def update(self, intervals):
+    """
+    Add list of [start, end] or counted intervals
+    """
+    if isinstance(intervals, Intervals):
+      for (start, end), count in intervals.__counts.iteritems():
+        self.add(start, end, count)
+    else:
+      for start, end in intervals:
+        self.add(start, end)
+
+  def __len__(self):
+    """
+    Return count of all added intervals
+    """
+    return self.__depth
+
+  def copy(self):
+    """
+    Return copy which can be changed
+    """
+    return Intervals(self)
+
+  def merged(self):
+    """
+    Return distinct intervals extended by following intervals while they overlap
+      Interval is extended by the nearest following interval with greater end, so it's counted in linear time
+    """
+    ends = [0] * len(self.__sorted)
+    following = [] # indexes of following intervals with greater ends
+    merged = set()
+
+    for index in reversed(xrange(len(self.__sorted))):
+      (start, end) = self.__sorted[index]
+
+      while following and self.__sorted[following[-1]][1] < end:
+        following.pop()
+
+      if following and self.__sorted[following[-1]][0] <= end: # extended like following interval
+        ends[index] = ends[following[-1]]
+      else:
+        ends[index] = end
+
+      following.append(index)
+      merged.add((start, ends[index]))
+
+    return sorted(merged)
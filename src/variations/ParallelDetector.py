@@ -0,0 +1,224 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+import os
+import heapq
+import bisect
+import cPickle
+import itertools
+import tempfile
+import multiprocessing
+import pysam
+from bx.intervals.intersection import Intersecter, Interval
+
+from Detector import Detector
+from src.interface.Settings import Settings
+from src.resources.Sample import Sample
+
+_shared = {} # values inherited by forked workers
+
+def _countChunk(chunk):
+  """
+  Count statistics of chunk in worker
+  """
+  Settings.PROFILE = False # statistics are saved by parent
+  refgenome = pysam.Fastafile(_shared['refgenome'])
+  sample = Sample(_shared['filename'], refgenome)
+
+  try:
+    return sample.countStatistics(chunk['reference'], chunk['start'], chunk['end'])
+  finally:
+    sample.close()
+
+def _collectChunk(chunk):
+  """
+  Find variations of pairs of chunk in worker and return variations which can meet variations of other chunks
+    Other variations are saved with index of reads of chunk into temporary file, whose name is returned too
+  """
+  Settings.PROFILE = False # statistics are saved by parent
+  Settings.STREAMING = False # variations of chunk are returned at once
+  refgenome = pysam.Fastafile(_shared['refgenome'])
+  sample = Sample(_shared['filename'], refgenome, _shared['statistics'])
+
+  try:
+    detector = Detector(sample, refgenome, None)
+    (met, alone) = detector.splitChunk(detector.collectChunk(chunk['reference'], chunk['start'], chunk['end'], chunk['first']), chunk['interior'])
+    (descriptor, filename) = tempfile.mkstemp(suffix=".chunk")
+
+    with os.fdopen(descriptor, 'wb') as saved:
+      cPickle.dump((alone, sample.exportIndex()), saved, cPickle.HIGHEST_PROTOCOL)
+
+    return met, filename
+  finally:
+    sample.close()
+
+def _clusterChunk(task):
+  """
+  Cluster saved variations of chunk in worker and return variations which meet intrusions of other chunks
+    Records of clusters replace variations in temporary file, whose name is returned too
+  """
+  (chunk, filename, intrusions) = task
+  Settings.PROFILE = False # statistics are saved by parent
+  refgenome = pysam.Fastafile(_shared['refgenome'])
+  sample = Sample(_shared['filename'], refgenome, _shared['statistics'])
+
+  try:
+    with open(filename, 'rb') as saved:
+      (alone, index) = cPickle.load(saved)
+
+    sample.importIndex(index, chunk['reference'], chunk['start'], chunk['end'])
+    detector = Detector(sample, refgenome, None)
+    (met, alone) = detector.splitChunk(alone, intrusions=intrusions)
+
+    with open(filename, 'wb') as saved:
+      for record in detector.getRecords(detector.mergeChunks([alone])):
+        cPickle.dump(record, saved, cPickle.HIGHEST_PROTOCOL)
+
+    return met, filename
+  finally:
+    sample.close()
+
+def _loadRecords(filename):
+  """
+  Return records saved by worker and remove their file
+  """
+  try:
+    with open(filename, 'rb') as saved:
+      while True:
+        yield cPickle.load(saved)
+  except EOFError: # all records were read
+    pass
+  finally:
+    os.remove(filename)
+
+class ParallelDetector:
+  """
+  Detector of variations running in chunks of genome in more processes
+    Statistics are counted in chunks and merged, then variations are found in chunks and split by their boundaries
+    Variations which can meet variations of other chunks are clustered by parent, others are clustered in chunks by workers
+  """
+  CHUNK_SIZE = 10000000 # length of chunk
+
+  def __init__(self, filename, sample, refgenome, output, jobs):
+    """
+    Initialize variables
+    """
+    self.__filename = filename
+    self.__sample = sample
+    self.__refgenome = refgenome
+    self.__output = output
+    self.__jobs = jobs
+
+  def __chunks(self, whole, margin=0):
+    """
+    Return chunks of region or of whole references of region
+      Interior of chunk is farther than margin from neighbouring chunks
+    """
+    chunks = []
+
+    for ref, length in zip(self.__sample.getReferences(), self.__sample.getLengths()):
+      if Settings.REFERENCE is not None and ref != Settings.REFERENCE:
+        continue
+
+      start = 0 if whole or Settings.START is None else Settings.START
+      end = length if whole or Settings.END is None else min(length, Settings.END)
+      starts = range(start, end, ParallelDetector.CHUNK_SIZE) or [start]
+
+      for chunkStart in starts:
+        chunkEnd = min(end, chunkStart + ParallelDetector.CHUNK_SIZE)
+        chunks.append({'reference': ref,
+                       'start': chunkStart,
+                       'end': chunkEnd,
+                       'first': chunkStart == starts[0],
+                       'interior': (ref,
+                                    chunkStart if chunkStart == starts[0] else chunkStart + margin,
+                                    chunkEnd if chunkEnd == end else chunkEnd - margin)})
+
+    return chunks
+
+  def __imap(self, function, tasks):
+    """
+    Run function for all tasks in new pool of workers and return results in order of tasks as they come
+    """
+    pool = multiprocessing.Pool(self.__jobs)
+
+    try:
+      for result in pool.imap(function, tasks, 1):
+        yield result
+    finally:
+      pool.terminate()
+      pool.join()
+
+  def __intrusions(self, chunk, trees, positions):
+    """
+    Return intervals (tid, start, end) and SNP positions (tid, position) of split variations which intrude into interior of chunk
+    """
+    (reference, start, end) = chunk['interior']
+    tid = self.__sample.getRefIndex(reference)
+
+    if end <= start: # nothing is clustered in worker
+      return [], []
+
+    intervals = [(tid, interval.start, interval.end) for interval in trees[tid].find(start - 1, end)] if tid in trees else []
+    snps = positions.get(tid, [])
+    return intervals, snps[bisect.bisect_left(snps, (tid, start)):bisect.bisect_left(snps, (tid, end))]
+
+  def start(self):
+    """
+    Start finding variations and write them
+      Variations are collected in chunks first, variations intruding into other chunks are known only after all chunks
+      Records of clusters of chunks are saved by workers and merged with records of clusters of parent
+    """
+    _shared['filename'] = self.__filename
+    _shared['refgenome'] = self.__refgenome.filename
+
+    if not self.__sample.isLoaded(): # statistics weren't saved by previous run
+      self.__sample.mergeStatistics(list(self.__imap(_countChunk, self.__chunks(True))))
+
+    _shared['statistics'] = self.__sample.exportStatistics() # workers are forked with counted statistics
+    chunks = self.__chunks(False, 2 * self.__sample.getMaxInsertSize()) # pairs of neighbouring chunks don't reach farther
+    detector = Detector(self.__sample, self.__refgenome, self.__output)
+    met = ([], []) # variations split by collecting and by clustering of chunks
+    files = []
+    trees = {} # tid: intervals of split variations
+    positions = {} # tid: sorted SNP positions of split variations
+
+    try:
+      for variations, filename in self.__imap(_collectChunk, chunks):
+        met[0].append(variations)
+        files.append(filename)
+        (intervals, snps) = detector.getSpans(variations)
+
+        for tid, start, end in intervals:
+          trees.setdefault(tid, Intersecter()).add_interval(Interval(start, end))
+
+        for key in snps:
+          positions.setdefault(key[0], []).append(key)
+
+      for tid in positions:
+        positions[tid].sort()
+
+      tasks = [(chunk, filename, self.__intrusions(chunk, trees, positions)) for chunk, filename in zip(chunks, files)]
+
+      for variations, filename in self.__imap(_clusterChunk, tasks):
+        met[1].append(variations)
+
+      clusters = detector.mergeChunks([parts for pair in zip(*met) for parts in pair]) # the same order as one pass
+      records = itertools.chain.from_iterable(_loadRecords(filename) for filename in files) # chunks are in order of positions
+      detector.writeRecords(record for key, record in heapq.merge(records, detector.getRecords(clusters)))
+    finally:
+      for filename in files:
+        if os.path.exists(filename): # not read
+          os.remove(filename)
+
+    detector.close()
+    return 0
+
+  def getStatistics(self):
+    """
+    Return statistics useful for tuning of settings, chunks are never streamed
+    """
+    return []
@@ -0,0 +1,138 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+from Intervals import Intervals
+from Variation import Variation
+from VariationInfo import VariationInfo
+from clusters.SnpCluster import SnpCluster
+
+class SmallVariations:
+  """
+  Counts SNPs and indels from CIGAR strings and MD tags of reads by their positions
+    SNPs are counted in clusters of their positions, same indels are returned as one variation with depth of their reads
+  """
+
+  def __init__(self, sample):
+    """
+    Initialize variables
+    """
+    self.__sample = sample
+    self.__snps = {} # (tid, position): cluster
+    self.__indels = {} # (tid, position, type, length): [reference sequence, count, order of first read]
+    self.__order = 0
+    self.__written = None # (tid, position) before which clusters were returned
+    self.__late = 0
+
+  def addSnp(self, tid, position, seq, refseq):
+    """
+    Count SNP of read
+    """
+    key = (tid, position)
+
+    if key in self.__snps:
+      self.__snps[key].addAllele(seq, refseq)
+    elif self.__written is not None and key < self.__written: # cluster of position was returned
+      self.__late += 1
+    else:
+      self.__snps[key] = SnpCluster(self.__sample.getRefName(tid), self.__sample, position)
+      self.__snps[key].addAllele(seq, refseq)
+
+  def addInsertion(self, tid, position, length):
+    """
+    Count insertion after position, reference sequence is fetched only for first read
+    """
+    key = (tid, position, Variation.vtype.INS, length)
+
+    if key in self.__indels:
+      self.__indels[key][1] += 1
+    else:
+      self.__indels[key] = [self.__sample.fetchReference(tid, position, position + 1), 1, self.__order]
+      self.__order += 1
+
+  def addDeletion(self, tid, position, refseq, length):
+    """
+    Count deletion after position, reference sequence of first read is kept
+    """
+    key = (tid, position, Variation.vtype.DEL, length)
+
+    if key in self.__indels:
+      self.__indels[key][1] += 1
+    else:
+      self.__indels[key] = [refseq, 1, self.__order]
+      self.__order += 1
+
+  def popIndels(self, limit=None):
+    """
+    Remove and return indels before limit (tid, position) as variations in order of their positions and first reads
+    """
+    variations = []
+
+    for key in sorted(self.__indels, key=lambda k: (k[:2], self.__indels[k][2])):
+      if limit is not None and limit <= key[:2]:
+        continue
+
+      (tid, position, vtype, length) = key
+      (refseq, count, order) = self.__indels.pop(key)
+      start = position + 1
+      info = VariationInfo(svlen=length, intervals=Intervals(), depth=count)
+      info['intervals'].add(start, start + length, count)
+
+      if vtype == Variation.vtype.DEL:
+        info['end'] = start + length
+
+      variations.append(Variation(vtype, self.__sample.getRefName(tid), position, None, refseq, Variation.mtype.CIGAR_MD, info=info))
+
+    return variations
+
+  def popClusters(self, limit=None):
+    """
+    Remove and return clusters of SNPs before limit (tid, position) in order of their positions
+      SNPs coming later before limit are dropped
+    """
+    clusters = []
+
+    for key in sorted(self.__snps):
+      if limit is None or key < limit:
+        clusters.append(self.__snps.pop(key))
+
+    if limit is not None:
+      self.__written = max(self.__written, limit)
+
+    return clusters
+
+  def export(self):
+    """
+    Return counted SNPs and indels without sample, so they can be merged in other process
+    """
+    return dict((key, cluster.getAlleles()) for key, cluster in self.__snps.items()), self.__indels
+
+  def merge(self, exported):
+    """
+    Add SNPs and indels counted after these ones, first reads of new indels keep their order
+    """
+    (snps, indels) = exported
+
+    for key, alleles in snps.items():
+      if key not in self.__snps:
+        self.__snps[key] = SnpCluster(self.__sample.getRefName(key[0]), self.__sample, key[1])
+
+      for seq, refseq, depth in alleles:
+        self.__snps[key].addAllele(seq, refseq, depth)
+
+    for key in sorted(indels, key=lambda k: indels[k][2]):
+      (refseq, count, order) = indels[key]
+
+      if key in self.__indels:
+        self.__indels[key][1] += count
+      else:
+        self.__indels[key] = [refseq, count, self.__order]
+        self.__order += 1
+
+  def getLate(self):
+    """
+    Return count of dropped SNPs
+    """
+    return self.__late
@@ -4,14 +4,14 @@
 __author__ = "Tomáš Beluský"
 __date__ = "05.03. 2013"
 
-import copy
-
+from VariationInfo import VariationInfo
 from src.interface.interface import *
 
-class Variation:
+class Variation(object):
   """
   Represents finded variation in genome
   """
+  __slots__ = ('__type', '__reference', '__method', '__start', '__seq', '__refseq', '__info')
   vtype = enum(# type of variation
                SNP=0,
                DEL=1,
@@ -34,9 +34,9 @@ class Variation:
                JOINED=3,
                VCF=4)
 
-  def __init__(self, vtype, reference, start, seq, refseq, mtype, info={}):
+  def __init__(self, vtype, reference, start, seq, refseq, mtype, info=None):
     """
-    Initialize variables
+    Initialize variables, informations can be given also as dictionary
     """
     self.__type = vtype
     self.__reference = reference
@@ -44,8 +44,7 @@ class Variation:
     self.__start = start
     self.__seq = seq
     self.__refseq = refseq
-    self.__clusters = []
-    self.__info = info
+    self.__info = info if isinstance(info, VariationInfo) else VariationInfo(info)
 
     if 'depth' not in self.__info:
       self.__info['depth'] = 1
@@ -142,17 +141,18 @@ class Variation:
   def getInfo(self, key=None):
     """
     Return all informations or only one information if key is not None
+      All informations mustn't be changed, their copy can be changed
     """
     if key:
       return self.__info.get(key, None)
     else:
-      return copy.deepcopy(self.__info)
+      return self.__info
 
   def incDepth(self):
     """
     Increment depth
     """
-    self.__info['depth'] += 1
+    self.__info.depth += 1
 
   def overlap(self, variation, check=True):
     """
@@ -0,0 +1,120 @@
+#!/usr/bin/python2.7
+#-*- encoding: utf-8 -*-
+
+__author__ = "Tomáš Beluský"
+__date__ = "18.10. 2026"
+
+from Intervals import Intervals
+
+class VariationInfo(object):
+  """
+  Compact informations about variation used like dictionary
+    Known keys are stored in fields, missing key is unset field, other keys are stored in small dictionary
+  """
+  KEYS = ('depth', 'intervals', 'svtype', 'imprecise', 'cpos', 'end', 'max', 'cend', 'svlen', 'cilen',
+          'conf', 'trachrom', 'trapos', 'tracpos', 'traend', 'tracend', 'method') # keys stored in fields
+  __slots__ = KEYS + ('__others',)
+  __fields = frozenset(KEYS)
+
+  def __init__(self, info=None, **items):
+    """
+    Initialize variables from dictionary or named items
+    """
+    self.__others = None
+
+    if info:
+      self.update(info)
+
+    if items:
+      self.update(items)
+
+  def __getitem__(self, key):
+    """
+    Return value of key
+    """
+    try:
+      return getattr(self, key) if key in VariationInfo.__fields else self.__others[key]
+    except (AttributeError, TypeError):
+      raise KeyError(key)
+
+  def __setitem__(self, key, value):
+    """
+    Set value of key
+    """
+    if key in VariationInfo.__fields:
+      setattr(self, key, value)
+    else:
+      if self.__others is None:
+        self.__others = {}
+
+      self.__others[key] = value
+
+  def __delitem__(self, key):
+    """
+    Remove key
+    """
+    try:
+      if key in VariationInfo.__fields:
+        delattr(self, key)
+      else:
+        del self.__others[key]
+    except (AttributeError, TypeError):
+      raise KeyError(key)
+
+  def __contains__(self, key):
+    """
+    Test if key is set
+    """
+    if key in VariationInfo.__fields:
+      return hasattr(self, key)
+
+    return self.__others is not None and key in self.__others
+
+  def __len__(self):
+    """
+    Return count of set keys
+    """
+    return len(self.keys())
+
+  def get(self, key, default=None):
+    """
+    Return value of key or default if it isn't set
+    """
+    if key in VariationInfo.__fields:
+      return getattr(self, key, default)
+
+    return default if self.__others is None else self.__others.get(key, default)
+
+  def keys(self):
+    """
+    Return set keys
+    """
+    keys = [key for key in VariationInfo.KEYS if hasattr(self, key)]
+    return keys if self.__others is None else keys + self.__others.keys()
+
+  def items(self):
+    """
+    Return set keys with their values
+    """
+    return [(key, self[key]) for key in self.keys()]
+
+  def update(self, info):
+    """
+    Set all keys of other informations or dictionary
+    """
+    for key, value in info.items():
+      self[key] = value
+
+  def copy(self):
+    """
+    Return copy which can be changed, lengths and intervals are also copied
+    """
+    info = VariationInfo(self)
+
+    if 'cilen' in info:
+      info['cilen'] = list(info['cilen'])
+
+    if 'intervals' in info:
+      info['intervals'] = Intervals(info['intervals'])
+
+    return info
@@ -26,6 +26,12 @@ class OppositeCluster(StructuralCluster):
     self.__reference = self.__variations[0].getReference()
     self._createJoinTable(self._sample)
 
+  def __countHelpers(self, variations):
+    """
+    Return count of reads of helping variations, counted variations have depth of their reads
+    """
+    return sum(variation.getInfo('depth') for variation in variations)
+
   def __coverageProcess(self, bestCount):
     """
     Find out winner variation with coverage
@@ -33,7 +39,7 @@ class OppositeCluster(StructuralCluster):
     winnerIndex = -1
 
     for index, variations in enumerate(self.__others):
-      if len(variations) == bestCount:
+      if self.__countHelpers(variations) == bestCount:
         actualWinnerIndex = -1
         variation = self.__variations[index]
         coverage = self._sample.getInexactCoverage(variation.getReference(), variation.getStart(), variation.getEnd())
@@ -66,11 +72,11 @@ class OppositeCluster(StructuralCluster):
     count = 0
 
     for index, variations in enumerate(self.__others): # find variations with most helpers
-      actualCount = len(variations)
+      actualCount = self.__countHelpers(variations)
 
       if actualCount > bestCount: # more helpers
         bestIndex = index
-        bestCount = len(self.__others[index])
+        bestCount = actualCount
         count = 1
       elif actualCount == bestCount: # same count of helpers
         count += 1
@@ -5,45 +5,41 @@ __author__ = "Tomáš Beluský"
 __date__ = "05.03. 2013"
 
 from AbstractCluster import AbstractCluster
-from src.variations.Variation import Variation
 from src.interface.Settings import Settings
 
 class SnpCluster(AbstractCluster):
   """
   Represents cluster of snp variations
+    Alleles of reads are counted, no variations are kept
   """
 
-  def __init__(self, rname, sample, variation):
+  def __init__(self, rname, sample, position):
     """
     Initialize variables
     """
     AbstractCluster.__init__(self, rname, sample)
-    self.__alleles = [variation]
-    self._reference = variation.getReference()
-    self._start = variation.getStart()
-    self._actualStart = self._start
-    self._end = variation.getEnd()
+    self.__alleles = [] # [sequence, reference sequence, depth]
+    self._reference = rname
+    self._start = position
+    self._actualStart = position
+    self._end = position
 
-  def add(self, variation):
+  def addAllele(self, seq, refseq, depth=1):
     """
-    Try to add variation into cluster and return if it fits into cluster
+    Count allele of read or depth of reads, reference sequence of first read with same allele is kept
     """
-    if variation.getType() == Variation.vtype.SNP and variation.getStart() == self._start:
-      append = True
+    for allele in self.__alleles: # find same allele and increment depth
+      if allele[0] == seq:
+        allele[2] += depth
+        return
 
-      for i in range(len(self.__alleles)): # find same variations and increment depth
-        if self.__alleles[i].getSequence() == variation.getSequence() and self.__alleles[i].getType() == variation.getType():
-          append = False
-          self.__alleles[i].incDepth()
-          break
+    self.__alleles.append([seq, refseq, depth])
 
-      if append: # append new variation
-        self.__alleles.append(variation)
-        self._end = max(self._end, variation.getEnd())
-
-      return True
-
-    return False
+  def getAlleles(self):
+    """
+    Return counted alleles as [sequence, reference sequence, depth] in order of their first reads
+    """
+    return self.__alleles
 
   def toString(self):
     """
@@ -55,26 +51,17 @@ class SnpCluster(AbstractCluster):
     refseqs = {}
     fulldepth = self._sample.getExactCoverage(self._rindex, self._start, self._end)
 
-    for var in self.__alleles: # get reference sequence and common info
-      confidence = self.countConfidence(var.getInfo('depth'), fulldepth)
+    for seq, refseq, depth in self.__alleles: # group alleles by reference sequence
+      confidence = self.countConfidence(depth, fulldepth)
 
       if confidence < Settings.MIN_CONFIDENCE:
         continue
 
-      refseq = var.getReferenceSequence()
-
-      if refseq in refseqs: # reference sequence exists
-        for key, value in refseqs[refseq].items():
-          if key == "sequences": # append allele sequence
-            refseqs[refseq]['sequences'].append(var.getSequence())
-          elif key == 'conf': # add depth of allele
-            refseqs[refseq]['conf'].append(confidence)
-          elif var.getInfo(key) != value: # remove not common info
-            del refseqs[refseq][key]
-      else: # new reference sequence
-        refseqs[refseq] = var.getInfo()
-        refseqs[refseq]['conf'] = [confidence]
-        refseqs[refseq]['sequences'] = [var.getSequence()]
+      if refseq not in refseqs: # new reference sequence
+        refseqs[refseq] = {'conf' : [], 'sequences' : []}
+
+      refseqs[refseq]['conf'].append(confidence)
+      refseqs[refseq]['sequences'].append(seq)
 
     result = []
 
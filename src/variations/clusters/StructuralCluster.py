@@ -4,17 +4,16 @@
 __author__ = "Tomáš Beluský"
 __date__ = "04.04. 2013"
 
-import copy
-import operator
-
 from AbstractCluster import AbstractCluster
 from src.variations.factories.JoinFactory import JoinFactory
+from src.variations.Intervals import Intervals
 from src.variations.Variation import Variation
 from src.interface.Settings import Settings
 
 class StructuralCluster(AbstractCluster):
   """
   Represents cluster of structural variations
+    Intervals of added variations are collected in cluster, consensus is joined without them
   """
 
   def __init__(self, rname, sample, variation):
@@ -23,6 +22,7 @@ class StructuralCluster(AbstractCluster):
     """
     AbstractCluster.__init__(self, rname, sample)
     self.__consensus = variation
+    self.__intervals = Intervals(variation.getInfo('intervals')) if variation else Intervals()
     self.__processConsensus()
     self._createJoinTable(sample)
 
@@ -59,14 +59,12 @@ class StructuralCluster(AbstractCluster):
     """
     Join two variations into one
     """
+    joinFunction = self._joinFactoryRef[first.getType()][second.getType()]
+
     if second.getStart() < first.getStart():
-      firstCopy = copy.deepcopy(second)
-      secondCopy = copy.deepcopy(first)
-    else:
-      firstCopy = copy.deepcopy(first)
-      secondCopy = copy.deepcopy(second)
+      return joinFunction(second, first)
 
-    return self._joinFactoryRef[first.getType()][second.getType()](firstCopy, secondCopy)
+    return joinFunction(first, second)
 
   def add(self, variation):
     """
@@ -78,6 +76,8 @@ class StructuralCluster(AbstractCluster):
     newConsensus = self._join(self.__consensus, variation)
 
     if newConsensus is not None:
+      self.__intervals.update(variation.getInfo('intervals'))
+      newConsensus.getInfo()['intervals'] = Intervals() # consensus is owned by cluster
       self.__consensus = newConsensus
       self.__processConsensus()
       return True
@@ -91,31 +91,17 @@ class StructuralCluster(AbstractCluster):
     if not self.__consensus:
       return ""
 
-    info = self.__consensus.getInfo()
-    info['intervals'] = sorted(info['intervals'], key=operator.itemgetter(0))
-    depth = len(info['intervals'])
+    info = self.__consensus.getInfo().copy()
+    depth = len(self.__intervals)
     fulldepth = 0
-    intervals = {}
-
-    while info['intervals']: # get overlaped intervals
-      int1 = info['intervals'].pop(0)
-      count = 1
 
-      for int2 in info['intervals']:
-        if (int1[0] <= int2[0] and int2[0] <= int1[1]) or (int2[0] <= int1[0] and int1[0] <= int2[1]):
-          breakends = zip(int1, int2)
-          int1 = [min(breakends[0]), max(breakends[1])]
-          count += 1
-
-      intervals[tuple(int1)] = count
-
-    for start, end in intervals: # get fulldepth in intervals
+    for start, end in self.__intervals.merged(): # get fulldepth in overlaped intervals
       fulldepth += self._sample.getExactCoverage(self._rindex, start, end)
 
-      info['conf'] = self.countConfidence(depth, fulldepth)
+    info['conf'] = self.countConfidence(depth, fulldepth)
 
-      if info['conf'] < Settings.MIN_CONFIDENCE:
-        return ""
+    if info['conf'] < Settings.MIN_CONFIDENCE:
+      return ""
 
     return "%s\t%s\t.\t%s\t%s\t.\t.\t%s" % (self._rname,
                                             self._actualStart + 1,
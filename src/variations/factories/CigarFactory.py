@@ -9,11 +9,11 @@ import re
 from BaseFactory import BaseFactory
 from src.interface.interface import *
 from src.interface.Settings import Settings
-from src.variations.Variation import Variation
 
 class CigarFactory(BaseFactory):
   """
   Creating factory of variations in CIGAR string and MD tag
+    Variations are counted in small variations instead of creating them for each read
   """
   op = enum(# operations
              ALIGNMENT=0,
@@ -27,11 +27,7 @@ class CigarFactory(BaseFactory):
              MISMATCH=8)
   sums = (op.ALIGNMENT, op.INSERTION, op.SOFTCLIP, op.MATCH, op.MISMATCH) # read seqence length
   abbr = 'MIDNSHP=X' # abbreviations
-  faStates = enum(# states of FA for finding SNPs and deletions from MD tag
-                  START=0,
-                  MATCH=1,
-                  DELETION=2)
-  bases = re.compile(r'[A-Z]', re.I) # re that folds all letters
+  mdTokens = re.compile(r'(\d+)|(\^[A-Z]*)|([A-Z])', re.I) # matches, deleted bases and SNPs of MD tag
 
   def __init__(self, sample):
     """
@@ -39,105 +35,52 @@ class CigarFactory(BaseFactory):
     """
     BaseFactory.__init__(self, sample)
 
-  def snpIndels(self, read):
+  def snpIndels(self, read, smallVariations):
     """
-    Get SNPs and indels from CIGAR string and MD tag
+    Count SNPs and indels from CIGAR string and MD tag of SAM read object into small variations
     """
-    if self._sample.readOutOfRegion(Settings.REFERENCE, Settings.START, Settings.END, read.sam):
+    if self._sample.readOutOfRegion(Settings.REFERENCE, Settings.START, Settings.END, read):
       return
 
-    tags = dict(read.sam.tags)
-    mdtag = tags.get("MD", [])
+    try:
+      tokens = iter(CigarFactory.mdTokens.findall(read.opt('MD')))
+    except KeyError: # SNPs and deletions can't be found
+      tokens = iter(())
+
     pos = read.pos
     refPos = pos
     queryIndex = 0
-    refname = self._sample.getRefName(read.tid)
 
-    for operation, length in read.sam.cigar: # look at all operations and their lengths in CIGAR
+    for operation, length in read.cigar: # look at all operations and their lengths in CIGAR
       if operation in (CigarFactory.op.ALIGNMENT, CigarFactory.op.MATCH, CigarFactory.op.MISMATCH): # shift index and position
         refPos += length
       elif operation != CigarFactory.op.DELETION: # skip parsing MD
         if operation == CigarFactory.op.SOFTCLIP: # shift query index
           queryIndex += length
         elif operation == CigarFactory.op.INSERTION: # store insertion
-          tmpPos = refPos - 1
           queryIndex += length
-          refseq = self._sample.fetchReference(read.tid, tmpPos, refPos)
-          yield Variation(Variation.vtype.INS, refname, tmpPos, None, refseq,
-                          Variation.mtype.CIGAR_MD,
-                          info={'svlen': length, 'intervals': [[refPos, refPos+length]]})
+          smallVariations.addInsertion(read.tid, refPos - 1, length)
 
         continue
 
-      state = CigarFactory.faStates.START
       internIndex = 0
-      match = ""
-      saveSNP = False
-      delLength = 0
-      delVariation = None
-      refseq = ""
-
-      while mdtag: # parse MD string from read tags
-        sign = mdtag[0]
-
-        if state == CigarFactory.faStates.START: # START STATE ---------------------
-          mdtag = mdtag[1:]
-
-          if sign.isdigit(): # matches
-            match += sign
-            state = CigarFactory.faStates.MATCH
-          elif CigarFactory.bases.match(sign):  # SNP
-            saveSNP = True
-          elif sign == '^': # deletion
-            pos -= 1
-            refseq = read.sam.seq[queryIndex-1]
-            state = CigarFactory.faStates.DELETION
-        elif state == CigarFactory.faStates.MATCH: # MATCH STATE -------------------
-          if sign.isdigit(): # match
-            match += sign
-            mdtag = mdtag[1:]
-          else: # stop matching
-            offset = int(match)
-            pos += offset
-            queryIndex += offset
-            internIndex += offset
-            match = ""
 
-            if internIndex < length: # continue parsing
-              mdtag = mdtag[1:]
-
-              if sign == '^': # deletion
-                pos -= 1
-                refseq = read.sam.seq[queryIndex-1]
-                state = CigarFactory.faStates.DELETION
-              else: # SNP
-                saveSNP = True
-        elif state == CigarFactory.faStates.DELETION: # DELETION STATE -------------
-          if CigarFactory.bases.match(sign): # deleted bases
-            mdtag = mdtag[1:]
-            delLength += 1
-            delPos = pos + 1
-            end = delPos + delLength
-            delVariation = Variation(Variation.vtype.DEL, refname, pos, None, refseq,
-                                     Variation.mtype.CIGAR_MD,
-                                     info={'svlen': delLength, 'intervals': [[delPos, end]], 'end' : end})
-          else: # end of deletion
-            internIndex += delLength
-            delLength = 0
-            state = CigarFactory.faStates.START
-            yield delVariation
-
-        if saveSNP: # save SNP
-          yield Variation(Variation.vtype.SNP, refname, pos, read.sam.seq[queryIndex], sign,
-                          Variation.mtype.CIGAR_MD, info={'intervals': [[pos, pos+1]]})
+      for match, deletion, snp in tokens: # walk MD tag tokens of operation, iterator keeps position for next operations
+        if match: # matches
+          offset = int(match)
+          pos += offset
+          queryIndex += offset
+          internIndex += offset
+        elif deletion: # deletion after previous base
+          pos -= 1
+          delLength = len(deletion) - 1
+          smallVariations.addDeletion(read.tid, pos, read.seq[queryIndex-1], delLength)
+          internIndex += delLength
+        else: # SNP
+          smallVariations.addSnp(read.tid, pos, read.seq[queryIndex], snp)
           pos += 1
           queryIndex += 1
           internIndex += 1
-          state = CigarFactory.faStates.START
-          saveSNP = False
 
         if internIndex >= length: # go to next cigar operation
           break
-
-      if state == CigarFactory.faStates.DELETION: # add deletion
-        yield delVariation
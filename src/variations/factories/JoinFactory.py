@@ -5,14 +5,16 @@ __author__ = "Tomáš Beluský"
 __date__ = "05.04. 2013"
 
 import sys
-import copy
 
 from BaseFactory import BaseFactory
+from src.variations.Intervals import Intervals
 from src.variations.Variation import Variation
+from src.variations.VariationInfo import VariationInfo
 
 class JoinFactory(BaseFactory):
   """
   Factory for joining same overlaping variations
+    Informations of joined variations aren't changed, shifted confidences are counted aside
   """
 
   def __init__(self, sample):
@@ -21,14 +23,14 @@ class JoinFactory(BaseFactory):
     """
     BaseFactory.__init__(self, sample)
 
-  def __countCpos(self, info1, info2, key='cpos'):
+  def __countCpos(self, cpos1, cpos2, key='cpos'):
     """
-    Count confidence start position
+    Count confidence start position from confidences of both variations, None is missing confidence
     """
-    if key in info1:
-      cpos = min(info1[key], info2[key]) if key in info2 else info1[key]
-    elif key in info2:
-      cpos = info2[key]
+    if cpos1 is not None:
+      cpos = min(cpos1, cpos2) if cpos2 is not None else cpos1
+    elif cpos2 is not None:
+      cpos = cpos2
     else:
       cpos = 0
 
@@ -42,13 +44,9 @@ class JoinFactory(BaseFactory):
       if 'cilen' in info2:
         cilen = [min(info1['cilen'][0], info2['cilen'][0]), max(info1['cilen'][1], info2['cilen'][1])]
       else:
-        cilen = info1['cilen']
-        cilen[0] = min(cilen[0], info2.get('svlen', sys.maxint))
-        cilen[1] = max(cilen[1], info2.get('svlen', 0))
+        cilen = [min(info1['cilen'][0], info2.get('svlen', sys.maxint)), max(info1['cilen'][1], info2.get('svlen', 0))]
     elif 'cilen' in info2:
-      cilen = info2['cilen']
-      cilen[0] = min(cilen[0], info1.get('svlen', sys.maxint))
-      cilen[1] = max(cilen[1], info1.get('svlen', 0))
+      cilen = [min(info2['cilen'][0], info1.get('svlen', sys.maxint)), max(info2['cilen'][1], info1.get('svlen', 0))]
     else:
       cilen = [0, 0]
 
@@ -58,14 +56,14 @@ class JoinFactory(BaseFactory):
 
     return {'cilen' : cilen}
 
-  def __countCend(self, info1, info2, key='cend'):
+  def __countCend(self, cend1, cend2, key='cend'):
     """
-    Count confidence end position
+    Count confidence end position from confidences of both variations, None is missing confidence
     """
-    if key in info1:
-      cend = max(info1[key], info2[key]) if key in info2 else info1[key]
-    elif key in info2:
-      cend = info2[key]
+    if cend1 is not None:
+      cend = max(cend1, cend2) if cend2 is not None else cend1
+    elif cend2 is not None:
+      cend = cend2
     else:
       cend = 0
 
@@ -73,9 +71,9 @@ class JoinFactory(BaseFactory):
 
   def __shiftConfidence(self, info, plus, key):
     """
-    Shift confidence position in key
+    Return confidence position in key shifted by plus
     """
-    info[key] = info.get(key, 0) + plus
+    return info.get(key, 0) + plus
 
   def __haveOverlap(self, first, second, info1, info2):
     """
@@ -87,7 +85,7 @@ class JoinFactory(BaseFactory):
     """
     Join intervals from both variations together
     """
-    return {'intervals' : info1['intervals'] + info2['intervals']}
+    return {'intervals' : Intervals(info1['intervals'], info2['intervals'])}
 
   def __boundaryVariaton(self, first, second, vtype):
     """
@@ -100,12 +98,10 @@ class JoinFactory(BaseFactory):
       return None
 
     pos = max(first.getStart(), second.getMaxStart())
-    info = {}
-    self.__shiftConfidence(info2, second.getStart() - pos, 'cpos')
+    info = VariationInfo()
     info['end'] = min(first.getMaxEnd(), second.getEnd())
-    self.__shiftConfidence(info1, first.getEnd() - info['end'], 'cend')
-    info.update(self.__countCpos(info1, info2))
-    info.update(self.__countCend(info1, info2))
+    info.update(self.__countCpos(info1.get('cpos'), self.__shiftConfidence(info2, second.getStart() - pos, 'cpos')))
+    info.update(self.__countCend(self.__shiftConfidence(info1, first.getEnd() - info['end'], 'cend'), info2.get('cend')))
     info.update(self.__countCilen(info1, info2, False))
     info.update(self.__countIntervals(info1, info2))
     self._repairInfo(pos, info)
@@ -122,10 +118,9 @@ class JoinFactory(BaseFactory):
     if not self.__haveOverlap(first, second, info1, info2):
       return None, None
 
-    self.__shiftConfidence(info1, first.getStart() - second.getStart(), 'cpos')
     pos = second.getStart()
-    info = {}
-    info.update(self.__countCpos(info1, info2))
+    info = VariationInfo()
+    info.update(self.__countCpos(self.__shiftConfidence(info1, first.getStart() - pos, 'cpos'), info2.get('cpos')))
     info.update(self.__countCilen(info1, info2, True))
     info.update(self.__countIntervals(info1, info2))
     self._repairInfo(pos, info)
@@ -152,11 +147,10 @@ class JoinFactory(BaseFactory):
     if not self.__haveOverlap(first, second, info1, info2) or (first.getStart() + info1.get('svlen', 0)) < second.getStart():
       return None
 
-    self.__shiftConfidence(info1, first.getStart() - second.getStart(), 'cpos')
     pos = second.getStart()
-    info = {}
+    info = VariationInfo()
     info['max'] = max(first.getEnd(), second.getEnd())
-    info.update(self.__countCpos(info1, info2))
+    info.update(self.__countCpos(self.__shiftConfidence(info1, first.getStart() - pos, 'cpos'), info2.get('cpos')))
     info.update(self.__countCilen(info1, info2, False))
     info.update(self.__countIntervals(info1, info2))
     self._repairInfo(pos, info)
@@ -188,9 +182,7 @@ class JoinFactory(BaseFactory):
     info2 = second.getInfo()
 
     if info2['trapos'] < info1['trapos']: # switch
-      tmp = copy.deepcopy(info1)
-      info1 = copy.deepcopy(info2)
-      info2 = tmp
+      (info1, info2) = (info2, info1)
 
     traMaxPos2 = info2['trapos'] + info2.get('tracpos', 0)
     traMaxEnd1 = info1['traend'] + info1.get('tracend', 0)
@@ -208,13 +200,11 @@ class JoinFactory(BaseFactory):
 
     # count start position of translocated sequence
     info['trapos'] = max(info1['trapos'], traMaxPos2)
-    self.__shiftConfidence(info2, info2['trapos'] - info['trapos'], 'tracpos')
-    info.update(self.__countCpos(info1, info2, 'tracpos'))
+    info.update(self.__countCpos(info1.get('tracpos'), self.__shiftConfidence(info2, info2['trapos'] - info['trapos'], 'tracpos'), 'tracpos'))
 
     # count end position of translocated sequence
     info['traend'] = min(traMaxEnd1, info2['traend'])
-    self.__shiftConfidence(info1, info1['traend'] - info['traend'], 'tracend')
-    info.update(self.__countCend(info1, info2, 'tracend'))
+    info.update(self.__countCend(self.__shiftConfidence(info1, info1['traend'] - info['traend'], 'tracend'), info2.get('tracend'), 'tracend'))
 
     info.update(self.__countIntervals(info1, info2))
     self._repairInfo(pos, info)
@@ -5,6 +5,7 @@ __author__ = "Tomáš Beluský"
 __date__ = "25.03. 2013"
 
 from src.variations.Variation import Variation
+from src.variations.VariationInfo import VariationInfo
 from src.variations.clusters.OppositeCluster import OppositeCluster
 from BaseFactory import BaseFactory
 
@@ -31,7 +32,7 @@ class PairFactory(BaseFactory):
     """
     Create insertion
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.pos - 1
     info['cilen'] = [self._sample.getMinInsertSize() - paired.actualSize(), self._sample.getMaxInsertSize() - paired.actualSize()]
     info['cpos'] = -paired.actualSize()
@@ -42,7 +43,7 @@ class PairFactory(BaseFactory):
     """
     Create deletion
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.read.end + self._sample.getMaxInsertSize() - 1
     info['max'] = paired.mate.pos - 1
     info['cilen'] = [paired.actualSize() - self._sample.getMaxInsertSize(), paired.actualSize() - self._sample.getMinInsertSize()]
@@ -54,7 +55,7 @@ class PairFactory(BaseFactory):
     """
     Create inversion of read
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.read.pos
     info['end'] = paired.read.end
     info['cpos'] = -self._sample.getMaxInsertSize()
@@ -66,7 +67,7 @@ class PairFactory(BaseFactory):
     """
     Create inversion of mate
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.pos
     info['end'] = paired.mate.end
     info['cpos'] = -paired.actualSize()
@@ -78,7 +79,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication from overlap
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.pos - 1
     info['end'] = min(paired.read.end, paired.mate.end)
     info['cpos'] = -self._sample.getMaxInsertSize() - (paired.read.end - paired.mate.pos)
@@ -93,7 +94,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication from rearranged overlap
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.pos - 1
     info['end'] = min(paired.read.end, paired.mate.end)
     info['cend'] = paired.mate.end - paired.read.pos + self._sample.getMaxInsertSize()
@@ -107,7 +108,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication on right side when insert size is small
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.pos - 1
     overlap = (paired.actualSize() + paired.mate.len - self._sample.getMinInsertSize()) > 0
     info['end'] = paired.read.end + self._sample.getMinInsertSize() if overlap else paired.mate.end
@@ -122,7 +123,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication on right side when insert size is small
     """
-    info = {}
+    info = VariationInfo()
     info['end'] = paired.read.end
     overlap = (paired.actualSize() + paired.read.len - self._sample.getMinInsertSize()) > 0
     pos = (paired.mate.pos - self._sample.getMinInsertSize() if overlap else paired.read.pos) - 1
@@ -137,7 +138,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication on right side when insert size is big
     """
-    info = {}
+    info = VariationInfo()
     info['end'] = paired.mate.end
     overlap = (self._sample.getMaxInsertSize() + paired.mate.len - paired.actualSize()) > 0
     pos = (paired.read.end + self._sample.getMaxInsertSize() + paired.mate.len if overlap else paired.mate.pos) - 1
@@ -152,7 +153,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication on right side when insert size is big
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.read.pos - 1
     overlap = (self._sample.getMaxInsertSize() + paired.read.len - paired.actualSize()) > 0
     info['end'] = paired.mate.pos - self._sample.getMaxInsertSize() - paired.read.len if overlap else paired.read.end
@@ -167,7 +168,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication on right side with rearranged reads
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.pos - 1
     info['end'] = paired.mate.end
     info['cpos'] = paired.actualSize() + paired.mate.len - self._sample.getMaxInsertSize()
@@ -181,7 +182,7 @@ class PairFactory(BaseFactory):
     """
     Create duplication on left side with rearranged reads
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.read.pos - 1
     info['end'] = paired.read.end
     info['cpos'] = paired.actualSize() + paired.read.len - self._sample.getMaxInsertSize()
@@ -195,7 +196,7 @@ class PairFactory(BaseFactory):
     """
     Create translocation on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.read.end + self._sample.getMaxInsertSize() - 1
     info['cpos'] = -min(self._sample.getMaxInsertSize(), paired.actualSize())
     info['trachrom'] = paired.mate.reference
@@ -210,7 +211,7 @@ class PairFactory(BaseFactory):
     """
     Create translocation on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.pos - 1
     info['cpos'] = -min(self._sample.getMaxInsertSize(), paired.actualSize())
     info['trachrom'] = paired.read.reference
@@ -225,7 +226,7 @@ class PairFactory(BaseFactory):
     """
     Create rearranged translocation on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.read.pos - 1
     info['cpos'] = -self._sample.getMaxInsertSize()
     info['trachrom'] = paired.mate.reference
@@ -240,7 +241,7 @@ class PairFactory(BaseFactory):
     """
     Create rearranged translocation on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = paired.mate.end + self._sample.getMaxInsertSize() - 1
     info['cpos'] = -self._sample.getMaxInsertSize()
     info['trachrom'] = paired.read.reference
@@ -6,6 +6,7 @@ __date__ = "13.04. 2013"
 
 from src.interface.interface import *
 from src.variations.Variation import Variation
+from src.variations.VariationInfo import VariationInfo
 from src.variations.clusters.OppositeCluster import OppositeCluster
 from CigarFactory import CigarFactory
 from BaseFactory import BaseFactory
@@ -33,7 +34,7 @@ class SplitFactory(BaseFactory):
     """
     Create insertion of left part enclosed
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['cilen'] = [splitread.left.len, splitread.left.len]
     size = splitread.right.pos - read.end
@@ -46,7 +47,7 @@ class SplitFactory(BaseFactory):
     """
     Create insertion of right part enclosed
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.end - 1
     info['cilen'] = [splitread.right.len, splitread.right.len]
     size = read.pos - splitread.left.end
@@ -59,7 +60,7 @@ class SplitFactory(BaseFactory):
     """
     Create insertion of left part
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['cilen'] = [splitread.left.len, splitread.right.pos]
     info['intervals'] = [[pos, splitread.right.pos], [pos, splitread.right.pos]]
@@ -69,7 +70,7 @@ class SplitFactory(BaseFactory):
     """
     Create insertion of right part
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.end - 1
     info['cilen'] = [splitread.right.len, self._countMaxLength(splitread.original.tid, splitread.left.end)]
     info['intervals'] = [[splitread.left.end, splitread.left.end + 1], [splitread.left.end, splitread.left.end + 1]]
@@ -79,7 +80,7 @@ class SplitFactory(BaseFactory):
     """
     Create insertion between split parts
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.pos - lengthLeft - 1
     info['svlen'] = 0
 
@@ -103,7 +104,7 @@ class SplitFactory(BaseFactory):
     """
     Create deletion
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.end - 1
     info['end'] = splitread.right.pos
     info['svlen'] = info['end'] - pos + 1
@@ -114,7 +115,7 @@ class SplitFactory(BaseFactory):
     """
     Create inversion on left part
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.remapped.pos
     info['end'] = splitread.primary.pos
     info['svlen'] = info['end'] - pos + 1
@@ -125,7 +126,7 @@ class SplitFactory(BaseFactory):
     """
     Create inversion on right part
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.primary.end
     info['end'] = splitread.remapped.end
     info['svlen'] = info['end'] - pos + 1
@@ -136,7 +137,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication from overlap of remapped part and mate pair
     """
-    info = {}
+    info = VariationInfo()
     pos = max(splitpair.read.pos, splitread.remapped.pos) - 1
     info['end'] = min(splitpair.read.end, splitread.remapped.end)
 
@@ -160,7 +161,7 @@ class SplitFactory(BaseFactory):
     """
     Create tandem duplication from overlapped parts
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['end'] = splitread.left.end
     info['svlen'] = info['end'] - pos + 1
@@ -171,7 +172,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication from overlapped and rearranged parts
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['end'] = splitread.left.end
     info['cend'] = (splitread.right.pos - splitread.left.pos) + (splitread.right.end - splitread.left.end)
@@ -185,7 +186,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication of rearranged parts which enclose mate on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.pos - 1
     info['end'] = splitread.left.end
     info['cend'] = splitread.right.end - info['end']
@@ -199,7 +200,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication of rearranged parts which enclose mate on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['end'] = splitread.right.end
     info['cpos'] = splitread.left.pos - pos
@@ -213,7 +214,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication of parts which enclose mate on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.pos - 1
     info['end'] = splitread.left.end
     info['cpos'] = splitread.left.end - splitread.right.pos + splitread.left.len
@@ -227,7 +228,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication of parts which enclose mate on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['end'] = splitread.right.end
     info['cend'] = splitread.right.pos - splitread.left.end - splitread.right.len
@@ -241,7 +242,7 @@ class SplitFactory(BaseFactory):
     """
     Create rearranged duplication on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.pos - 1
     info['end'] = splitread.left.end
     info['cend'] = splitread.right.end - info['end']
@@ -255,7 +256,7 @@ class SplitFactory(BaseFactory):
     """
     Create rearranged duplication on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['end'] = splitread.right.end
     info['cpos'] = splitread.left.pos - pos
@@ -269,7 +270,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication on left side
     """
-    info = {}
+    info = VariationInfo()
     vtype = Variation.vtype.DUP
     pos = splitread.left.pos - 1
     info['end'] = splitread.left.end
@@ -294,7 +295,7 @@ class SplitFactory(BaseFactory):
     """
     Create duplication on right side
     """
-    info = {}
+    info = VariationInfo()
     vtype = Variation.vtype.DUP
     pos = splitread.right.pos - 1
     info['end'] = splitread.right.end
@@ -319,7 +320,7 @@ class SplitFactory(BaseFactory):
     """
     Create translocation of rearranged parts which enclose mate on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.end - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.left.pos - 1
@@ -332,7 +333,7 @@ class SplitFactory(BaseFactory):
     """
     Create translocation of rearranged parts which enclose mate on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.pos - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.right.pos - 1
@@ -345,7 +346,7 @@ class SplitFactory(BaseFactory):
     """
     Create translocation of parts which enclose mate on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.left.pos - 1
@@ -358,7 +359,7 @@ class SplitFactory(BaseFactory):
     """
     Create translocation of parts which enclose mate on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.end - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.right.pos - 1
@@ -371,7 +372,7 @@ class SplitFactory(BaseFactory):
     """
     Create rearranged translocation on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.end - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.left.pos - 1
@@ -384,7 +385,7 @@ class SplitFactory(BaseFactory):
     """
     Create rearranged translocation on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.pos - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.right.pos - 1
@@ -397,7 +398,7 @@ class SplitFactory(BaseFactory):
     """
     Create translocation on left side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.right.pos - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.left.pos - 1
@@ -410,7 +411,7 @@ class SplitFactory(BaseFactory):
     """
     Create translocation on right side
     """
-    info = {}
+    info = VariationInfo()
     pos = splitread.left.end - 1
     info['trachrom'] = splitread.original.reference
     info['trapos'] = splitread.right.pos - 1